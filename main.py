@@ -4,36 +4,167 @@ import os
 import time
 from src.load_images import load_images
 from src.settings import Settings
-from src.level import Level
-from src.solver import DijkstraSolver
-from src.level_generator import LevelGenerator
+from src.level import Level, iter_bits
+from src.solver import quick_solver
+from src.solver_worker import SolveTask
+from src.solution_cache import SolutionCache
+from src.hint import HintEngine
+from src.history import MoveHistory
+from src.generation_pipeline import GenerationPipeline
+from src.level_repository import LevelRepository
 from src.progress import Progress
 from src.generator_settings import GeneratorSettings
 
+KEY_REPEAT_EVENT = pygame.USEREVENT + 1
+MOVE_KEYS = {
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+}
+HINT_MESSAGES = {
+    'deadlocked': "Тупик: отмените ходы (U)",
+    'searching': "Ищем подсказку...",
+    'unavailable': "Подсказку найти не удалось",
+}
+
+
+def wait_events(timeout=None):
+    """Спит до первого события или до истечения timeout (мс) и возвращает все накопившиеся события"""
+    event = pygame.event.wait() if timeout is None else pygame.event.wait(max(1, int(timeout)))
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
 class Renderer:
+    """Статические клетки (стены, пол, цели) рисуются один раз на фон уровня.
+    Кадр перерисовывает только клетки, изменившиеся с прошлого кадра, и строки статуса,
+    а на экран отправляются только их прямоугольники"""
+
     def __init__(self, settings):
         self.settings = settings
         self.images = {}
+        self.background = None
+        self.board = None
+        self.tiles = {}
+        self.lines = []
+        self.text_surfaces = []
+        self.text_rects = []
         self.load_theme_images()
 
     def load_theme_images(self):
-        self.images = load_images(self.settings.current_theme)
-
-    def draw_level(self, level):
-        for y, row in enumerate(level.data):
-            for x, tile in enumerate(row):
-                if sprite := self.images.get(tile):
-                    self.settings.screen.blit(
-                        sprite, (x * self.settings.TILE_SIZE, y * self.settings.TILE_SIZE))
-
-    def draw_status(self, start_time, move_history):
+        self.images = load_images(self.settings.current_theme, self.settings.TILE_SIZE)
+        self.invalidate()
+
+    def invalidate(self):
+        """Следующий кадр будет нарисован целиком"""
+        self.board = None
+
+    def tile_rect(self, board, i):
+        size = self.settings.TILE_SIZE
+        x, y = board.coords(i)
+        return pygame.Rect(x * size, y * size, size, size)
+
+    def build_background(self, board):
+        self.background = pygame.Surface(self.settings.screen.get_size()).convert()
+        self.background.fill(self.settings.get_backcolor())
+        for i, tile in enumerate(board.template):
+            if sprite := self.images.get(tile):
+                self.background.blit(sprite, self.tile_rect(board, i))
+        self.board = board
+
+    def render_lines(self, lines):
+        self.lines = list(lines)
+        self.text_surfaces = [self.settings.font.render(text, True, self.settings.COLORS['BLACK'])
+                              for text, _ in lines]
+        self.text_rects = [surface.get_rect(topleft=pos) for surface, (_, pos) in zip(self.text_surfaces, lines)]
+
+    def redraw_tiles(self, board, rect):
+        """Возвращает ящики и игрока, попавших под стертую область"""
+        for i, tile in self.tiles.items():
+            tile_rect = self.tile_rect(board, i)
+            if tile_rect.colliderect(rect):
+                self.settings.screen.blit(self.images[tile], tile_rect)
+
+    def status_lines(self, start_time, move_history):
         elapsed_time = time.time() - start_time
-        timer_text = f"Time: {int(elapsed_time)}s"
-        steps_text = f"Steps: {len(move_history)}"
-        timer_surface = self.settings.font.render(timer_text, True, self.settings.COLORS['BLACK'])
-        steps_surface = self.settings.font.render(steps_text, True, self.settings.COLORS['BLACK'])
-        self.settings.screen.blit(timer_surface, (self.settings.SCREEN_WIDTH - 200, 20))
-        self.settings.screen.blit(steps_surface, (self.settings.SCREEN_WIDTH - 200, 60))
+        return [
+            (f"Time: {int(elapsed_time)}s", (self.settings.SCREEN_WIDTH - 200, 20)),
+            (f"Steps: {len(move_history)}", (self.settings.SCREEN_WIDTH - 200, 60)),
+        ]
+
+    def solver_progress_lines(self, progress):
+        lines = [
+            "Поиск решения... ESC: отмена",
+            f"Состояний: {progress.expanded}",
+            f"Фронт: {progress.frontier}",
+            f"Отсечено: {progress.pruned}",
+            f"Оценка: {progress.bound}",
+        ]
+        return [(text, (self.settings.SCREEN_WIDTH - 450, 120 + i * 40)) for i, text in enumerate(lines)]
+
+    @staticmethod
+    def dynamic_tiles(level):
+        """Клетки с ящиками и игроком - все, что меняется между ходами"""
+        board = level.board
+        tiles = {}
+        for i in iter_bits(level.boxes):
+            tiles[i] = '*' if board.goals & board.bits[i] else '$'
+        if level.player >= 0:
+            tiles[level.player] = '+' if board.goals & board.bits[level.player] else '@'
+        return tiles
+
+    def draw_frame(self, level, lines):
+        """Рисует кадр: lines - список (текст, позиция). Возвращает обновленные прямоугольники"""
+        screen = self.settings.screen
+        tiles = self.dynamic_tiles(level)
+
+        if self.board != level.board:
+            self.build_background(level.board)
+            full = True
+        else:
+            full = not self.settings.DIRTY_RECTS
+
+        if full:
+            screen.blit(self.background, (0, 0))
+            for i, tile in tiles.items():
+                screen.blit(self.images[tile], self.tile_rect(level.board, i))
+            self.tiles = tiles
+            self.render_lines(lines)
+            for surface, rect in zip(self.text_surfaces, self.text_rects):
+                screen.blit(surface, rect)
+            pygame.display.flip()
+            return [screen.get_rect()]
+
+        board = level.board
+        dirty = []
+        for i in self.tiles.keys() | tiles.keys():
+            tile = tiles.get(i)
+            if tile == self.tiles.get(i):
+                continue
+            rect = self.tile_rect(board, i)
+            screen.blit(self.background, rect, rect)
+            if tile:
+                screen.blit(self.images[tile], rect)
+            dirty.append(rect)
+        self.tiles = tiles
+
+        if lines != self.lines:
+            for rect in self.text_rects:
+                screen.blit(self.background, rect, rect)
+                self.redraw_tiles(board, rect)
+                dirty.append(rect)
+            self.render_lines(lines)
+            dirty.extend(self.text_rects)
+        # строки статуса рисуются поверх клеток, задетых этим кадром
+        for surface, rect in zip(self.text_surfaces, self.text_rects):
+            if rect.collidelist(dirty) >= 0:
+                screen.blit(surface, rect)
+
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
 
 class Menu:
     def __init__(self, settings):
@@ -41,9 +172,9 @@ class Menu:
         self.selected_button = 0
         self.scroll_offset = 0
         self.visible_levels = 6
-        self.level_generator = LevelGenerator()
         self.generator_settings = GeneratorSettings(settings)
         self.show_settings = False
+        self.clock = pygame.time.Clock()
 
     def draw_main_menu(self, completed_levels):
         self.settings.screen.fill(self.settings.COLORS['MENU_BG'])
@@ -115,12 +246,14 @@ class Menu:
         pygame.display.flip()
 
     def handle_main_menu(self, game):
+        self.draw_main_menu(game.progress.get_total_completed())
         while True:
-            self.draw_main_menu(game.progress.get_total_completed())
-            for event in pygame.event.get():
+            changed = False
+            for event in wait_events():
                 if event.type == pygame.QUIT:
                     return False
                 if event.type == pygame.KEYDOWN:
+                    changed = True
                     if event.key == pygame.K_UP:
                         self.selected_button = max(0, self.selected_button - 1)
                     elif event.key == pygame.K_DOWN:
@@ -132,12 +265,19 @@ class Menu:
                 elif event.type == pygame.MOUSEBUTTONDOWN and self.show_settings:
                     if event.button == 1:
                         self.generator_settings.handle_mouse_down(event.pos)
+                        changed = True
                 elif event.type == pygame.MOUSEBUTTONUP and self.show_settings:
                     if event.button == 1:
                         self.generator_settings.handle_mouse_up()
                 elif event.type == pygame.MOUSEMOTION and self.show_settings:
-                    self.generator_settings.handle_mouse_motion(event.pos)
-            pygame.display.flip()
+                    if self.generator_settings.active_slider:
+                        self.generator_settings.handle_mouse_motion(event.pos)
+                        changed = True
+                elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    changed = True
+            if changed:
+                self.draw_main_menu(game.progress.get_total_completed())
+                self.clock.tick(self.settings.FPS)
         return True
 
     def get_current_buttons(self):
@@ -161,38 +301,34 @@ class Menu:
             return False
         elif buttons[self.selected_button] == "Сгенерировать":
             settings = self.generator_settings.get_settings()
-            self.level_generator = LevelGenerator(settings['width'], settings['height'])
-            self.level_generator.wall_chance = settings['wall_chance']
-            self.level_generator.box_chance = settings['box_chance']
-            self.level_generator.target_chance = settings['target_chance']
-            
             self.generator_settings.start_generation()
-            attempts = 0
-            max_attempts = 100
-            
-            while attempts < max_attempts:
-                attempts += 1
+            pipeline = GenerationPipeline(settings, max_attempts=100).start()
 
+            while not pipeline.done:
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
+                        pipeline.cancel()
                         self.generator_settings.finish_generation()
                         return False
+                    if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                        pipeline.cancel()
+                        self.generator_settings.finish_generation()
+                        print("\nГенерация отменена")
+                        return None
 
+                pipeline.poll()
+                self.generator_settings.update_solver_progress(pipeline.progress)
                 self.draw_main_menu(game.progress.get_total_completed())
-                pygame.display.flip()
-                
-                game.current_generated_level = self.level_generator.generate()
-                temp_level = Level(game.current_generated_level)
-
-                self.generator_settings.update_solver_progress(attempts / max_attempts)
-                
-                if game.solver.solve(temp_level):
-                    print("\nСгенерирован проходимый уровень")
-                    self.generator_settings.finish_generation()
-                    return "generated"
-                print("\nУровень нерешаем, генерируем новый...")
-            
+                self.clock.tick(min(30, self.settings.FPS))
+
+            pipeline.poll()
             self.generator_settings.finish_generation()
+            if pipeline.found:
+                print(f"\nСгенерирован проходимый уровень (попыток: {pipeline.attempts})")
+                game.current_generated_level, solution = pipeline.found[0]
+                if solution is not None:
+                    game.solutions.put(Level(game.current_generated_level), solution)
+                return "generated"
             print("\nНе удалось сгенерировать проходимый уровень")
             return None
         return True
@@ -206,32 +342,17 @@ class Game:
         self.clock = pygame.time.Clock()
         self.levels = self.load_levels()
         self.progress = Progress()
-        self.solver = DijkstraSolver()
+        self.solver = quick_solver()
+        self.solutions = SolutionCache(self.settings.SOLUTIONS_FILE)
+        self.hints = HintEngine(self.solutions)
         self.current_generated_level = None
+        self.repeat_key = None
 
     def load_levels(self):
         if not os.path.exists(self.settings.LEVELS_DIR):
             print(f"Error: Directory '{self.settings.LEVELS_DIR}' not found.")
             return []
-
-        levels = []
-        for filename in sorted(os.listdir(self.settings.LEVELS_DIR)):
-            if not filename.endswith('.txt'):
-                continue
-            with open(os.path.join(self.settings.LEVELS_DIR, filename), 'r') as file:
-                lines = [line.rstrip() for line in file.readlines()]
-                while lines and not lines[0].strip():
-                    lines.pop(0)
-                while lines and not lines[-1].strip():
-                    lines.pop()
-                
-                if not lines:
-                    continue
-
-                max_width = max(len(line) for line in lines)
-                level = [line.ljust(max_width) for line in lines]
-                levels.append(level)
-        return levels
+        return LevelRepository(self.settings.LEVELS_DIR)
 
     def handle_main_menu(self):
         while True:
@@ -257,12 +378,16 @@ class Game:
 
     def handle_level_selection(self):
         selected_level = 0
+        self.menu.draw_level_menu(selected_level, self.progress.completed_levels, len(self.levels))
         while True:
-            self.menu.draw_level_menu(selected_level, self.progress.completed_levels, len(self.levels))
-            for event in pygame.event.get():
+            changed = False
+            for event in wait_events():
                 if event.type == pygame.QUIT:
                     return -1
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    changed = True
                 if event.type == pygame.KEYDOWN:
+                    changed = True
                     if event.key == pygame.K_UP and selected_level > 0:
                         selected_level -= 1
                         if selected_level < self.menu.scroll_offset:
@@ -278,12 +403,16 @@ class Game:
                         return selected_level
                     elif event.key == pygame.K_ESCAPE:
                         return -1
+            if changed:
+                self.menu.draw_level_menu(selected_level, self.progress.completed_levels, len(self.levels))
+                self.clock.tick(self.settings.FPS)
         return -1
 
     def animate_solution(self, level, solution, move_history):
+        """False - окно закрыто; отсутствие решения не выход из уровня"""
         if not solution:
             print("\nРешение не найдено!")
-            return
+            return True
 
         print(f"\nНайдено решение из {len(solution)} ходов")
         animation_delay = 200
@@ -292,87 +421,169 @@ class Game:
         solution_index = 0
         while solution_index < len(solution):
             current_time = pygame.time.get_ticks()
-            
-            for event in pygame.event.get():
+            timeout = max(0, animation_delay - (current_time - last_move_time))
+
+            for event in wait_events(timeout):
                 if event.type == pygame.QUIT:
                     return False
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.renderer.invalidate()
                 if event.type == pygame.KEYDOWN:
                     if event.key in (pygame.K_ESCAPE, pygame.K_s):
                         return True
 
-            if current_time - last_move_time > animation_delay:
-                dx, dy = solution[solution_index]
-                move_history.append([row[:] for row in level.data])
-                level.move_player(dx, dy)
+            current_time = pygame.time.get_ticks()
+            if current_time - last_move_time >= animation_delay:
+                move_history.move(level, *solution[solution_index])
                 solution_index += 1
                 last_move_time = current_time
 
-            self.settings.screen.fill(self.settings.get_backcolor())
-            self.renderer.draw_level(level)
-            self.renderer.draw_status(time.time(), move_history)
-            pygame.display.flip()
-            self.clock.tick(60)
+            self.renderer.draw_frame(level, self.renderer.status_lines(time.time(), move_history))
+            self.clock.tick(self.settings.FPS)
 
         return True
 
     def play_level(self, level, level_index=None, is_generated=False):
-        move_history = []
+        try:
+            return self.run_level(level, level_index, is_generated)
+        finally:
+            self.stop_key_repeat()
+            self.hints.cancel()
+
+    def start_key_repeat(self, key, interval):
+        """Повтор удерживаемой клавиши идет через таймер pygame, а не через опрос клавиатуры"""
+        self.repeat_key = key
+        pygame.time.set_timer(KEY_REPEAT_EVENT, interval)
+
+    def stop_key_repeat(self):
+        self.repeat_key = None
+        pygame.time.set_timer(KEY_REPEAT_EVENT, 0)
+
+    def run_level(self, level, level_index, is_generated):
+        move_history = MoveHistory()
+        session_file = os.path.join(self.settings.SESSIONS_DIR,
+                                    "generated.lurd" if is_generated else f"level{level_index + 1}.lurd")
         start_time = time.time()
-        move_key_delay = 100
-        last_move_time = 0
-        undo_key_delay = 80
-        last_undo_time = 0
+        solve_task = None
+        hint_message = None
+        # подсказка ищется в фоне: опрашиваем движок каждый кадр, пока игрок ничего не нажал
+        hint_pending = False
 
         level_name = "Сгенерированный" if is_generated else f"Level {level_index + 1}"
         print(f"\nНачинаем уровень {level_name}")
+        self.renderer.invalidate()
 
         while True:
-            current_time = pygame.time.get_ticks()
-            keys = pygame.key.get_pressed()
-            dx, dy = 0, 0
-
-            if keys[pygame.K_LEFT]: dx = -1
-            elif keys[pygame.K_RIGHT]: dx = 1
-            elif keys[pygame.K_UP]: dy = -1
-            elif keys[pygame.K_DOWN]: dy = 1
-
-            if (dx != 0 or dy != 0) and (current_time - last_move_time > move_key_delay):
-                move_history.append([row[:] for row in level.data])
-                if level.move_player(dx, dy):
-                    last_move_time = current_time
-                else:
-                    move_history.pop()
-
-            if keys[pygame.K_u] and move_history and (current_time - last_undo_time > undo_key_delay):
-                last_undo_time = current_time
-                if move_history:
-                    print("\nОтмена хода")
-                    level.data = move_history.pop()
-                    level.find_player()
-                    level.moves_count -= 1
+            if solve_task or hint_pending:
+                timeout = 1000 / self.settings.FPS
+            else:
+                # без событий просыпаемся только к смене секунды на таймере
+                timeout = 1000 - (time.time() - start_time) * 1000 % 1000
 
-            for event in pygame.event.get():
+            for event in wait_events(timeout):
                 if event.type == pygame.QUIT:
+                    if solve_task:
+                        solve_task.cancel()
                     return False
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r:
-                        print("\nПерезапуск уровня")
-                        level = Level(level.data)
-                        move_history.clear()
-                        start_time = time.time()
-                    elif event.key == pygame.K_s:
-                        print("\nЗапуск солвера...")
-                        solution = self.solver.solve(Level(level.data))
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    # открытое заново окно перерисовывается целиком, а не только измененные клетки
+                    self.renderer.invalidate()
+                    continue
+                if event.type == pygame.KEYUP:
+                    if event.key == self.repeat_key:
+                        self.stop_key_repeat()
+                    continue
+                if event.type == KEY_REPEAT_EVENT:
+                    key = self.repeat_key
+                elif event.type == pygame.KEYDOWN:
+                    key = event.key
+                else:
+                    continue
+
+                if solve_task:
+                    if event.type == pygame.KEYDOWN and key == pygame.K_ESCAPE:
+                        print("\nПоиск решения отменен")
+                        solve_task.cancel()
+                        solve_task = None
+                    continue
+
+                hint_message = None
+                hint_pending = False
+                if key in MOVE_KEYS:
+                    if event.type == pygame.KEYDOWN:
+                        self.start_key_repeat(key, self.settings.MOVE_REPEAT)
+                    move_history.move(level, *MOVE_KEYS[key])
+                elif key == pygame.K_u:
+                    if event.type == pygame.KEYDOWN:
+                        self.start_key_repeat(key, self.settings.UNDO_REPEAT)
+                    if move_history.undo(level):
+                        print("\nОтмена хода")
+                elif key == pygame.K_y:
+                    if event.type == pygame.KEYDOWN:
+                        self.start_key_repeat(key, self.settings.UNDO_REPEAT)
+                    if move_history.redo(level):
+                        print("\nПовтор хода")
+                elif event.type != pygame.KEYDOWN:
+                    continue
+                elif key == pygame.K_r:
+                    print("\nПерезапуск уровня")
+                    move_history.rewind(level)
+                    move_history.clear()
+                    start_time = time.time()
+                elif key == pygame.K_s:
+                    self.stop_key_repeat()
+                    solution = self.solutions.get(level)
+                    if solution is not None:
+                        print("\nРешение найдено в кэше")
                         if not self.animate_solution(level, solution, move_history):
                             return False
-                    elif event.key == pygame.K_t:
-                        theme = "dark" if self.settings.current_theme == "default" else "default"
-                        print(f"\nСмена темы на: {theme}")
-                        self.settings.current_theme = theme
-                        self.renderer.load_theme_images()
-                    elif event.key in (pygame.K_m, pygame.K_ESCAPE):
-                        print("\nВыход в меню")
-                        return True
+                    else:
+                        print("\nЗапуск солвера...")
+                        solve_task = SolveTask(self.solver, level)
+                elif key == pygame.K_h:
+                    self.stop_key_repeat()
+                    hint_pending = True
+                elif key == pygame.K_F5:
+                    os.makedirs(self.settings.SESSIONS_DIR, exist_ok=True)
+                    move_history.save(session_file)
+                    print(f"\nХоды сохранены в {session_file}")
+                elif key == pygame.K_F9:
+                    if os.path.exists(session_file):
+                        try:
+                            move_history.load(level, session_file)
+                            print(f"\nХоды загружены из {session_file}")
+                        except ValueError as error:
+                            print(f"\nНе удалось повторить ходы: {error}")
+                elif key == pygame.K_t:
+                    theme = "dark" if self.settings.current_theme == "default" else "default"
+                    print(f"\nСмена темы на: {theme}")
+                    self.settings.current_theme = theme
+                    self.renderer.load_theme_images()
+                elif key in (pygame.K_m, pygame.K_ESCAPE):
+                    print("\nВыход в меню")
+                    return True
+
+            if solve_task and solve_task.poll():
+                solution = solve_task.result
+                if solution:
+                    self.solutions.put(solve_task.level, solution, solve_task.progress.expanded, solve_task.elapsed)
+                solve_task = None
+                if not self.animate_solution(level, solution, move_history):
+                    return False
+
+            if hint_pending:
+                hint = self.hints.hint(level)
+                if hint.status == 'push':
+                    hint_pending = False
+                    hint_message = None
+                    # показываем одно толкание вместе с подходом к ящику
+                    if not self.animate_solution(level, hint.moves, move_history):
+                        return False
+                else:
+                    hint_pending = hint.status == 'searching'
+                    if HINT_MESSAGES.get(hint.status) != hint_message:
+                        hint_message = HINT_MESSAGES.get(hint.status)
+                        print(f"\nПодсказка: {hint_message}")
 
             if level.check_win():
                 elapsed_time = int(time.time() - start_time)
@@ -385,11 +596,13 @@ class Game:
                     self.progress.add_completed_level(level_index)
                 return True
 
-            self.settings.screen.fill(self.settings.get_backcolor())
-            self.renderer.draw_level(level)
-            self.renderer.draw_status(start_time, move_history)
-            pygame.display.flip()
-            self.clock.tick(60)
+            lines = self.renderer.status_lines(start_time, move_history)
+            if solve_task:
+                lines += self.renderer.solver_progress_lines(solve_task.progress)
+            elif hint_message:
+                lines.append((hint_message, (self.settings.SCREEN_WIDTH - 450, 120)))
+            self.renderer.draw_frame(level, lines)
+            self.clock.tick(self.settings.FPS)
 
 if __name__ == "__main__":
     os.makedirs(Settings().LEVELS_DIR, exist_ok=True)
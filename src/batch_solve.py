@@ -0,0 +1,124 @@
+"""Пакетное решение уровней без графики: python -m src.batch_solve levels/ pack.xsb --time-limit 30
+
+На каждый уровень печатается одна строка JSON. Модуль не импортирует pygame"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from src.heuristics import ManhattanHeuristic
+from src.level import Level
+from src.level_repository import LevelPack, LevelRepository
+from src.solution_cache import moves_to_pushes
+from src.solver import AStarSolver, BidirectionalSolver, DijkstraSolver, IDAStarSolver, PushSolver, quick_solver
+
+SOLVERS = {
+    'push': PushSolver,
+    'quick': quick_solver,
+    'bidirectional': BidirectionalSolver,
+    'idastar': IDAStarSolver,
+    'astar': AStarSolver,
+    'manhattan': lambda **kwargs: AStarSolver(ManhattanHeuristic(), **kwargs),
+    'dijkstra': DijkstraSolver,
+}
+
+
+def iter_levels(paths):
+    """(имя, номер в наборе, строки) для каждого уровня из каталогов и файлов наборов"""
+    for path in paths:
+        if os.path.isdir(path):
+            repository = LevelRepository(path)
+            for pack in repository.packs:
+                for i in range(len(pack)):
+                    yield os.path.basename(pack.path), i, pack[i]
+            repository.close()
+        else:
+            directory, filename = os.path.split(path)
+            pack = LevelPack(path, os.path.join(directory, '.index', filename + '.idx'))
+            for i in range(len(pack)):
+                yield filename, i, pack[i]
+            pack.close()
+
+
+def peak_memory():
+    """Пиковый RSS текущего процесса в байтах"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def solve_level(task):
+    name, index, rows, solver_name, time_limit, memory_limit = task
+    if resource is not None and memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    started = time.perf_counter()
+    deadline = started + time_limit if time_limit else None
+    result = {'file': name, 'level': index, 'solved': False, 'status': 'unsolvable'}
+    solver = SOLVERS[solver_name](
+        memory_limit=memory_limit // 2 if memory_limit else 512 * 1024 * 1024,
+        progress=lambda progress: deadline is None or time.perf_counter() < deadline,
+        verbose=False)
+    # толкающий солвер на сложных уровнях раскрывает десятки состояний в секунду - проверяем время чаще
+    solver.progress_interval = 16
+    level = Level(rows)
+    try:
+        solution = solver.solve(level)
+    except MemoryError:
+        solution = None
+        result['status'] = 'memory'
+    else:
+        if solution is not None:
+            result.update(solved=True, status='solved', moves=len(solution),
+                          pushes=len(moves_to_pushes(level, solution)))
+        elif solver.stats.cancelled == 'memory':
+            result['status'] = 'memory'
+        elif solver.stats.cancelled:
+            result['status'] = 'timeout'
+
+    stats = solver.stats
+    result.update(states=stats.expanded, generated=stats.generated, duplicates=stats.duplicates,
+                  pruned=stats.pruned, max_frontier=stats.max_frontier)
+    if getattr(solver, 'iterations', None):
+        result['iterations'] = solver.iterations
+    if getattr(solver, 'meeting', None):
+        result['meeting'] = solver.meeting
+    result['time'] = round(time.perf_counter() - started, 4)
+    result['peak_memory'] = peak_memory()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Решает уровни без графики и печатает JSON по строке на уровень")
+    parser.add_argument('paths', nargs='+', help="каталоги с уровнями или файлы .txt/.xsb/.sok")
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='push')
+    parser.add_argument('--time-limit', type=float, default=60, help="секунд на уровень, 0 - без ограничения")
+    parser.add_argument('--memory-limit', type=int, default=2048, help="МБ на уровень, 0 - без ограничения")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    memory_limit = args.memory_limit * 1024 * 1024
+    tasks = ((name, index, rows, args.solver, args.time_limit, memory_limit)
+             for name, index, rows in iter_levels(args.paths))
+
+    solved = total = 0
+    # новый процесс на каждый уровень: пик памяти и ограничения считаются отдельно для уровня
+    with multiprocessing.Pool(args.workers, maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(solve_level, tasks):
+            total += 1
+            solved += result['solved']
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    print(f"Solved {solved} of {total} levels", file=sys.stderr)
+    return 0 if solved == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
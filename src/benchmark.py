@@ -0,0 +1,188 @@
+"""Воспроизводимые замеры солверов.
+
+    python -m src.benchmark run --output results.json [--save-baseline]
+    python -m src.benchmark compare benchmark_baseline.json results.json
+
+Набор: уровни из levels/ и уровни LevelGenerator с фиксированными зернами в трех размерах.
+Каждый замер идет в отдельном процессе, поиск ограничен числом состояний, поэтому работа
+одинакова между запусками и меняется только время"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+
+from src.batch_solve import SOLVERS, peak_memory
+from src.level import Level
+from src.level_generator import LevelGenerator
+from src.level_repository import LevelRepository
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+# (ярус, ширина, высота, обратных ходов, уровней, зерно)
+GENERATED_TIERS = [
+    ('small', 7, 7, 60, 5, 1),
+    ('medium', 10, 10, 120, 5, 2),
+    ('large', 14, 14, 200, 5, 3),
+]
+
+# (солвер, предел состояний) для уровней из levels/
+BUNDLED_SOLVERS = [('quick', 200), ('push', 200), ('astar', 10000), ('dijkstra', 200000)]
+GENERATED_SOLVER = ('push', 2000)
+
+# более короткие замеры времени - в основном шум, по времени они не сравниваются
+MIN_TIME = 0.05
+
+
+def generated_levels():
+    for tier, width, height, pulls, count, seed in GENERATED_TIERS:
+        random.seed(seed)
+        generator = LevelGenerator(width, height)
+        generator.wall_chance = 0.2
+        generator.box_chance = 0.1
+        generator.pulls = pulls
+        for i in range(count):
+            yield f"{tier}/{i}", generator.generate()
+
+
+def build_cases(levels_dir):
+    cases = []
+    repository = LevelRepository(levels_dir)
+    for i in range(len(repository)):
+        for solver, max_states in BUNDLED_SOLVERS:
+            cases.append((f"levels/{i}", repository[i], solver, max_states))
+    repository.close()
+    solver, max_states = GENERATED_SOLVER
+    for name, rows in generated_levels():
+        cases.append((name, rows, solver, max_states))
+    return cases
+
+
+def run_case(case):
+    name, rows, solver_name, max_states = case
+    solver = SOLVERS[solver_name](progress=lambda progress: progress.expanded < max_states, verbose=False)
+    solver.progress_interval = 16
+    level = Level(rows)
+
+    gc.collect()
+    collections = sum(stat['collections'] for stat in gc.get_stats())
+    blocks = sys.getallocatedblocks()
+    started = time.perf_counter()
+    solution = solver.solve(level)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'case': f"{name}:{solver_name}",
+        'solved': solution is not None,
+        'moves': len(solution) if solution is not None else None,
+        'states': solver.stats.expanded,
+        'generated': solver.stats.generated,
+        'duplicates': solver.stats.duplicates,
+        'pruned': solver.stats.pruned,
+        'time': round(elapsed, 6),
+        'states_per_sec': round(solver.stats.expanded / elapsed, 1) if elapsed else None,
+        'peak_rss': peak_memory(),
+        # число живых блоков, выделенных за поиск, и число сборок мусора как мера числа аллокаций
+        'allocated_blocks': sys.getallocatedblocks() - blocks,
+        'gc_collections': sum(stat['collections'] for stat in gc.get_stats()) - collections,
+    }
+
+
+def run(levels_dir, repeat=1):
+    cases = build_cases(levels_dir)
+    results = {}
+    # новый процесс на замер: пиковый RSS не копится от предыдущих случаев
+    with multiprocessing.get_context('spawn').Pool(1, maxtasksperchild=1) as pool:
+        for _ in range(repeat):
+            for result in pool.imap(run_case, cases):
+                best = results.get(result['case'])
+                if best is None or result['time'] < best['time']:
+                    results[result['case']] = result
+                print(f"{result['case']:<28} {result['states']:>8} states {result['time']:>9.3f}s "
+                      f"{result['states_per_sec'] or 0:>10.0f}/s", file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+        },
+        'cases': list(results.values()),
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Регрессии относительно базового замера: время, скорость и память хуже более чем на threshold,
+    а также изменившееся число состояний (поиск детерминирован, значит изменилось поведение)"""
+    previous = {case['case']: case for case in baseline['cases']}
+    regressions = []
+    for case in current['cases']:
+        old = previous.get(case['case'])
+        if old is None:
+            continue
+        if case['states'] != old['states'] or case['solved'] != old['solved']:
+            regressions.append((case['case'], 'states', old['states'], case['states']))
+        if old['time'] >= MIN_TIME and case['time'] > old['time'] * (1 + threshold):
+            regressions.append((case['case'], 'time', old['time'], case['time']))
+        if old['peak_rss'] and case['peak_rss'] and case['peak_rss'] > old['peak_rss'] * (1 + threshold):
+            regressions.append((case['case'], 'peak_rss', old['peak_rss'], case['peak_rss']))
+    return regressions
+
+
+def report(regressions, file=sys.stdout):
+    for case, metric, old, new in regressions:
+        print(f"REGRESSION {case}: {metric} {old} -> {new}", file=file)
+    if not regressions:
+        print("No regressions", file=file)
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры солверов на фиксированном наборе уровней")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--levels', default='levels')
+    run_parser.add_argument('--repeat', type=int, default=3, help="повторы, берется лучшее время")
+    run_parser.add_argument('--output', help="файл для результатов в JSON (по умолчанию stdout)")
+    run_parser.add_argument('--baseline', default=BASELINE_FILE)
+    run_parser.add_argument('--save-baseline', action='store_true', help="записать результаты как базовые")
+    run_parser.add_argument('--threshold', type=float, default=0.1)
+
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+        return report(compare(baseline, current, args.threshold))
+
+    results = run(args.levels, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            return report(compare(json.load(file), results, args.threshold), sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+from collections import deque
+
+from src.level import DIRECTIONS
+from src.level_analysis import analyze
+
+# пары направлений вдоль горизонтальной и вертикальной оси
+AXES = [(DIRECTIONS.index((-1, 0)), DIRECTIONS.index((1, 0))),
+        (DIRECTIONS.index((0, -1)), DIRECTIONS.index((0, 1)))]
+
+
+class DeadlockDetector:
+    """Отсечение тупиковых позиций: мертвые клетки, замороженные ящики, блоки 2x2 и (опционально) корралы"""
+
+    def __init__(self, corral=False, corral_limit=2000):
+        self.corral = corral
+        self.corral_limit = corral_limit
+
+    def prepare(self, board):
+        self.board = board
+        self.analysis = analyze(board)
+        self.dead = self.analysis.dead
+
+    def is_dead_square(self, cell):
+        return bool(self.dead & self.board.bits[cell])
+
+    def is_deadlocked(self, player, boxes, cell):
+        """Проверка после толкания ящика в клетку cell"""
+        if self.dead & self.board.bits[cell]:
+            return True
+        if self.is_blocked_square(boxes, cell) or self.is_frozen(boxes, cell):
+            return True
+        return self.corral and self.is_corral_deadlock(player, boxes)
+
+    def is_blocked_square(self, boxes, cell):
+        """Ящик входит в квадрат 2x2 из стен и ящиков, где есть ящик не на цели"""
+        board = self.board
+        bits = board.bits
+        solid = board.walls | boxes
+        for first, second in [(0, 1), (1, 2), (2, 3), (3, 0)]:
+            a = board.steps[first][cell]
+            b = board.steps[second][cell]
+            c = board.steps[second][a] if a >= 0 else -1
+            square = (cell, a, b, c)
+            if all(i < 0 or solid & bits[i] for i in square) and \
+                    any(i >= 0 and boxes & bits[i] and not board.goals & bits[i] for i in square):
+                return True
+        return False
+
+    def is_frozen(self, boxes, cell):
+        """Ящик в cell не может сдвинуться ни по одной оси, и среди замороженных есть ящик не на цели"""
+        frozen = []
+        if not self._frozen(boxes, cell, {cell}, frozen):
+            return False
+        goals = self.board.goals
+        bits = self.board.bits
+        return any(not goals & bits[box] for box in frozen)
+
+    def _frozen(self, boxes, cell, walls, frozen):
+        board = self.board
+        bits = board.bits
+        found = []
+        for first, second in AXES:
+            a = board.steps[first][cell]
+            b = board.steps[second][cell]
+            if board.is_wall(a) or board.is_wall(b):
+                continue
+            if self.dead & bits[a] and self.dead & bits[b]:
+                continue
+            blocked = False
+            for side in (a, b):
+                if side in walls:
+                    blocked = True
+                elif boxes & bits[side]:
+                    # на время проверки соседа текущий ящик считается стеной; ящики ветки попадают
+                    # в found, только если сосед действительно заморожен
+                    branch = []
+                    walls.add(side)
+                    blocked = self._frozen(boxes, side, walls, branch)
+                    walls.discard(side)
+                    if blocked:
+                        found.extend(branch)
+                if blocked:
+                    break
+            if not blocked:
+                return False
+        frozen.extend(found)
+        frozen.append(cell)
+        return True
+
+    def is_corral_deadlock(self, player, boxes):
+        """Ищет недостижимую для игрока область, ящики которой даже без остальных ящиков не расставить по целям"""
+        board = self.board
+        bits = board.bits
+        cells, _ = board.reachable(player, boxes)
+        reached = 0
+        for cell in cells:
+            reached |= bits[cell]
+
+        seen = reached
+        for start in range(board.size):
+            if board.walls & bits[start] or boxes & bits[start] or seen & bits[start]:
+                continue
+            corral_cells = 0
+            corral_boxes = 0
+            queue = [start]
+            seen |= bits[start]
+            for cell in queue:
+                if boxes & bits[cell]:
+                    corral_boxes |= bits[cell]
+                else:
+                    corral_cells |= bits[cell]
+                for step in board.steps:
+                    nxt = step[cell]
+                    if nxt < 0 or board.walls & bits[nxt] or seen & bits[nxt]:
+                        continue
+                    seen |= bits[nxt]
+                    queue.append(nxt)
+            if corral_boxes and self._corral_stuck(player, corral_boxes, corral_cells):
+                return True
+        return False
+
+    def _corral_stuck(self, player, boxes, corral_cells):
+        """Упрощенная задача только с ящиками коррала: True, если расставить их не удается"""
+        board = self.board
+        bits = board.bits
+        goals = board.goals
+        if not boxes & ~goals and not corral_cells & goals:
+            return False
+
+        visited = set()
+        queue = deque([(player, boxes)])
+        while queue:
+            player, boxes = queue.popleft()
+            cells, normalized = board.reachable(player, boxes)
+            if (boxes, normalized) in visited:
+                continue
+            visited.add((boxes, normalized))
+            if not boxes & ~goals:
+                return False
+            if len(visited) > self.corral_limit or any(corral_cells & bits[cell] for cell in cells):
+                # коррал открылся или перебор слишком велик - тупик не доказан
+                return False
+            for cell in cells:
+                for step in board.steps:
+                    box = step[cell]
+                    if box < 0 or not boxes & bits[box]:
+                        continue
+                    target = step[box]
+                    if target < 0 or board.walls & bits[target] or boxes & bits[target] or self.dead & bits[target]:
+                        continue
+                    new_boxes = boxes ^ bits[box] ^ bits[target]
+                    if self.is_blocked_square(new_boxes, target) or self.is_frozen(new_boxes, target):
+                        continue
+                    queue.append((box, new_boxes))
+        return True
@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import queue
+import random
+
+from src.level import Level
+from src.level_generator import LevelGenerator
+from src.solver import PushSolver
+
+
+def _generate_worker(settings, seed, max_attempts, max_states, attempts, stop_event, results):
+    random.seed(seed)
+    generator = LevelGenerator(settings['width'], settings['height'])
+    generator.wall_chance = settings['wall_chance']
+    generator.box_chance = settings['box_chance']
+    generator.target_chance = settings['target_chance']
+    generator.pulls = settings.get('pulls', 0)
+    solver = PushSolver(progress=lambda progress: not stop_event.is_set() and progress.expanded < max_states,
+                        verbose=False)
+
+    while not stop_event.is_set():
+        with attempts.get_lock():
+            if attempts.value >= max_attempts:
+                break
+            attempts.value += 1
+
+        rows = generator.generate()
+        if generator.pulls > 0:
+            # обратная генерация решаема по построению - солвер не нужен, решения в результате нет
+            results.put((rows, None))
+            continue
+        solution = solver.solve(Level(rows))
+        if solution:
+            results.put((rows, solution))
+
+
+class GenerationPipeline:
+    """Параллельная генерация: кандидаты и проверка решаемости распределены по процессам.
+    poll() возвращает новые решаемые уровни (rows, solution); после count найденных остальные процессы
+    останавливаются. При settings['pulls'] > 0 уровни строятся обратными ходами и solution - None"""
+
+    def __init__(self, settings, count=1, max_attempts=100, workers=None, max_states=20000, seed=None):
+        self.settings = settings
+        self.count = count
+        self.max_attempts = max_attempts
+        self.workers = workers or os.cpu_count() or 1
+        self.max_states = max_states
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.found = []
+        self._processes = []
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        self._attempts = context.Value('i', 0)
+        self._stop_event = context.Event()
+        self._results = context.Queue()
+        for i in range(self.workers):
+            process = context.Process(
+                target=_generate_worker,
+                args=(self.settings, self.seed + i, self.max_attempts, self.max_states,
+                      self._attempts, self._stop_event, self._results),
+                daemon=True)
+            process.start()
+            self._processes.append(process)
+        return self
+
+    @property
+    def attempts(self):
+        return self._attempts.value
+
+    @property
+    def progress(self):
+        return min(1, self.attempts / self.max_attempts)
+
+    @property
+    def done(self):
+        return len(self.found) >= self.count or not any(process.is_alive() for process in self._processes)
+
+    def poll(self):
+        new = []
+        while len(self.found) < self.count:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self.found.append(result)
+            new.append(result)
+        if self.done:
+            self.cancel()
+        return new
+
+    def stream(self, timeout=0.1):
+        """Блокирующий генератор найденных уровней (rows, solution)"""
+        if not self._processes:
+            self.start()
+        try:
+            while len(self.found) < self.count:
+                try:
+                    result = self._results.get(timeout=timeout)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in self._processes):
+                        break
+                    continue
+                self.found.append(result)
+                yield result
+        finally:
+            self.cancel()
+
+    def cancel(self):
+        if not self._processes:
+            return
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout=0.5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._processes = []
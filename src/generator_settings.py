@@ -8,6 +8,7 @@ class GeneratorSettings:
         self.wall_chance = 0.3
         self.box_chance = 0.25
         self.target_chance = 0.2
+        self.pulls = 40
         self.sliders = []
         self.active_slider = None
         self.init_sliders()
@@ -18,9 +19,11 @@ class GeneratorSettings:
     def init_sliders(self):
         slider_width = 250
         slider_height = 15
-        slider_spacing = 60
+        slider_spacing = 55
         start_x = (self.settings.SCREEN_WIDTH - slider_width) // 2
-        start_y = 250
+        start_y = 210
+        self.slider_spacing = slider_spacing
+        self.start_y = start_y
 
         self.sliders = [
             {
@@ -57,18 +60,39 @@ class GeneratorSettings:
                 'min': 0.1,
                 'max': 0.4,
                 'rect': pygame.Rect(start_x, start_y + slider_spacing * 4, slider_width, slider_height)
+            },
+            {
+                'name': 'Обратных ходов',
+                'value': self.pulls,
+                'min': 0,
+                'max': 200,
+                'rect': pygame.Rect(start_x, start_y + slider_spacing * 5, slider_width, slider_height)
             }
         ]
+        self.layout()
+
+    def visible_sliders(self):
+        """При обратной генерации ящики стоят на целях, и их число задает шанс ящиков, а не шанс целей"""
+        if self.pulls > 0:
+            return [slider for slider in self.sliders if slider['name'] != 'Шанс целей']
+        return self.sliders
+
+    def layout(self):
+        """Расставляет видимые ползунки подряд, без промежутка на месте скрытого"""
+        for i, slider in enumerate(self.visible_sliders()):
+            slider['rect'].y = self.start_y + self.slider_spacing * i
 
     def draw(self, screen):
-        for slider in self.sliders:
+        for slider in self.visible_sliders():
             pygame.draw.rect(screen, self.settings.COLORS['GRAY'], slider['rect'], border_radius=8)
 
             handle_x = slider['rect'].x + (slider['rect'].width - 15) * ((slider['value'] - slider['min']) / (slider['max'] - slider['min']))
             handle_rect = pygame.Rect(handle_x, slider['rect'].y - 3, 15, 21)
             pygame.draw.rect(screen, self.settings.COLORS['HIGHLIGHT'], handle_rect, border_radius=8)
 
-            value = int(slider['value']) if slider['name'] in ['Ширина', 'Высота'] else f"{slider['value']:.2f}"
+            value = int(slider['value']) if slider['name'] in ['Ширина', 'Высота', 'Обратных ходов'] else f"{slider['value']:.2f}"
+            if slider['name'] == 'Обратных ходов' and not value:
+                value = "выкл"
             text = f"{slider['name']}: {value}"
             text_surface = self.settings.font.render(text, True, self.settings.COLORS['WHITE'])
             text_rect = text_surface.get_rect(center=(slider['rect'].centerx, slider['rect'].y - 20))
@@ -90,13 +114,14 @@ class GeneratorSettings:
                                (progress_x, progress_y, fill_width, progress_height),
                                border_radius=12)
 
-            progress_text = f"Проверка уровня... {int(self.solver_progress * 100)}%"
+            action = "Генерация" if self.pulls > 0 else "Проверка"
+            progress_text = f"{action} уровня... {int(self.solver_progress * 100)}%"
             text_surface = self.settings.font.render(progress_text, True, self.settings.COLORS['WHITE'])
             text_rect = text_surface.get_rect(center=(self.settings.SCREEN_WIDTH//2, progress_y - 30))
             screen.blit(text_surface, text_rect)
 
     def handle_mouse_down(self, pos):
-        for slider in self.sliders:
+        for slider in self.visible_sliders():
             handle_x = slider['rect'].x + (slider['rect'].width - 15) * ((slider['value'] - slider['min']) / (slider['max'] - slider['min']))
             handle_rect = pygame.Rect(handle_x, slider['rect'].y - 3, 15, 21)
             if handle_rect.collidepoint(pos):
@@ -129,6 +154,11 @@ class GeneratorSettings:
             self.box_chance = slider['value']
         elif slider['name'] == 'Шанс целей':
             self.target_chance = slider['value']
+        elif slider['name'] == 'Обратных ходов':
+            reverse = self.pulls > 0
+            self.pulls = int(slider['value'])
+            if reverse != (self.pulls > 0):
+                self.layout()
 
     def get_settings(self):
         return {
@@ -136,7 +166,8 @@ class GeneratorSettings:
             'height': self.height,
             'wall_chance': self.wall_chance,
             'box_chance': self.box_chance,
-            'target_chance': self.target_chance
+            'target_chance': self.target_chance,
+            'pulls': self.pulls
         }
 
     def update_solver_progress(self, progress):
@@ -0,0 +1,183 @@
+from collections import OrderedDict
+
+from src.level import iter_bits
+from src.level_analysis import INF, analyze
+
+
+def assign_row(cost, u, v, match, i):
+    """Фаза венгерского алгоритма: достраивает паросочетание match строкой i, сохраняя потенциалы u, v
+    допустимыми. Строки и столбцы нумеруются с 1, match[j] - строка столбца j или 0.
+    False, если строку i не с чем сопоставить"""
+    m = len(v) - 1
+    way = [0] * (m + 1)
+    minv = [INF] * (m + 1)
+    used = [False] * (m + 1)
+    match[0] = i
+    j0 = 0
+    while True:
+        used[j0] = True
+        i0 = match[j0]
+        row = cost[i0 - 1]
+        delta = INF
+        j1 = 0
+        for j in range(1, m + 1):
+            if used[j]:
+                continue
+            cur = row[j - 1] - u[i0] - v[j]
+            if cur < minv[j]:
+                minv[j] = cur
+                way[j] = j0
+            if minv[j] < delta:
+                delta = minv[j]
+                j1 = j
+        if delta == INF:
+            return False
+        for j in range(m + 1):
+            if used[j]:
+                u[match[j]] += delta
+                v[j] -= delta
+            else:
+                minv[j] -= delta
+        j0 = j1
+        if match[j0] == 0:
+            break
+    while j0:
+        j1 = way[j0]
+        match[j0] = match[j1]
+        j0 = j1
+    return True
+
+
+def min_cost_assignment(cost):
+    """Венгерский алгоритм для прямоугольной матрицы n x m, n <= m"""
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    match = [0] * (m + 1)
+    for i in range(1, n + 1):
+        if not assign_row(cost, u, v, match, i):
+            return INF
+    return -v[0]
+
+
+class Heuristic:
+    """Нижняя оценка числа ходов до решения. estimate возвращает None для тупиковых позиций"""
+
+    # целочисленные оценки позволяют солверу использовать очередь с корзинами
+    integral = True
+
+    def prepare(self, board):
+        self.board = board
+
+    def estimate(self, player, boxes, parent=None):
+        """parent - расстановка ящиков, из которой boxes получена толканиями одного ящика, если известна"""
+        return 0
+
+
+class ManhattanHeuristic(Heuristic):
+    def prepare(self, board):
+        super().prepare(board)
+        goals = [board.coords(goal) for goal in iter_bits(board.goals)]
+        self.nearest = []
+        for i in range(board.size):
+            x, y = board.coords(i)
+            self.nearest.append(min((abs(x - gx) + abs(y - gy) for gx, gy in goals), default=0))
+
+    def estimate(self, player, boxes, parent=None):
+        nearest = self.nearest
+        return sum(nearest[box] for box in iter_bits(boxes))
+
+
+class MatchingHeuristic(Heuristic):
+    """Минимальное паросочетание ящиков и целей по таблице расстояний толкания.
+    Оценки последних cache_size расстановок ящиков хранятся в LRU-кэше, а последних cache_size / 16 -
+    еще и вместе с потенциалами венгерского алгоритма. Если ящиков столько же, сколько целей, оценка
+    потомка со сдвинутым ящиком достраивается от потенциалов parent одной фазой за O(n^2), а не
+    решается заново за O(n^3): на уровнях с 40-50 ящиками это основная часть времени поиска"""
+
+    # примерный размер записи кэша: ключ-маска ящиков и узел OrderedDict, плюс 1/16 записи
+    # с потенциалами (четыре списка длиной в число ящиков)
+    ENTRY_SIZE = 320
+    DUALS_SHARE = 16
+
+    def __init__(self, cache_size=1 << 16):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.duals = OrderedDict()
+
+    def prepare(self, board):
+        super().prepare(board)
+        analysis = analyze(board)
+        self.goals = analysis.goals
+        self.distances = analysis.distances
+        self.nearest = analysis.nearest
+        self.cache.clear()
+        self.duals.clear()
+
+    def estimate(self, player, boxes, parent=None):
+        cache = self.cache
+        if boxes in cache:
+            cache.move_to_end(boxes)
+            return cache[boxes]
+
+        state = None
+        if parent is not None and bin(boxes ^ parent).count('1') == 2:
+            base = self.assignment(parent)
+            if base is not None and len(base[0]) == len(self.goals):
+                state = self.moved(boxes, base, (parent & ~boxes).bit_length() - 1,
+                                   (boxes & ~parent).bit_length() - 1)
+        if state is None:
+            state = self.assignment(boxes)
+        value = None if state is None else state[4]
+        cache[boxes] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def assignment(self, boxes):
+        """(клетки ящиков, u, v, match, стоимость) оптимального паросочетания или None"""
+        duals = self.duals
+        state = duals.get(boxes)
+        if state is not None:
+            duals.move_to_end(boxes)
+            return state
+        cells = list(iter_bits(boxes))
+        if len(cells) > len(self.goals) or any(self.nearest[cell] == INF for cell in cells):
+            return None
+        cost = [self.distances[cell] for cell in cells]
+        u = [0] * (len(cells) + 1)
+        v = [0] * (len(self.goals) + 1)
+        match = [0] * (len(self.goals) + 1)
+        for i in range(1, len(cells) + 1):
+            if not assign_row(cost, u, v, match, i):
+                return None
+        return self.remember(boxes, (cells, u, v, match, -v[0]))
+
+    def moved(self, boxes, base, old, new):
+        """Паросочетание после сдвига ящика из old в new: строка ящика снимается и добавляется заново.
+        Без свободных целей потенциалы остальных строк остаются оптимальными"""
+        if self.nearest[new] == INF:
+            return None
+        cells, u, v, match, _ = base
+        cells = cells[:]
+        u = u[:]
+        v = v[:]
+        match = match[:]
+        i = cells.index(old) + 1
+        cells[i - 1] = new
+        match[match.index(i, 1)] = 0
+        u[i] = 0
+        distances = self.distances
+        cost = [distances[cell] for cell in cells]
+        if not assign_row(cost, u, v, match, i):
+            return None
+        value = sum(cost[match[j] - 1][j - 1] for j in range(1, len(match)))
+        return self.remember(boxes, (cells, u, v, match, value))
+
+    def remember(self, boxes, state):
+        duals = self.duals
+        duals[boxes] = state
+        if len(duals) > max(1, self.cache_size // self.DUALS_SHARE):
+            duals.popitem(last=False)
+        return state
@@ -0,0 +1,198 @@
+import time
+
+from src.heuristics import INF, MatchingHeuristic
+from src.level import DIRECTIONS, iter_bits
+from src.solution_cache import moves_to_pushes
+from src.solver import PushSolver, quick_solver
+from src.solver_worker import SolveTask
+
+
+class Hint:
+    """Ответ подсказки. status: 'push' - следующее толкание (box, direction) и ходы игрока до него
+    включительно в moves, 'solved', 'deadlocked' - решения из позиции нет, 'searching' - поиск
+    продолжается в фоне, ответ будет при следующем вызове hint, 'unavailable' - фоновый поиск прерван
+    (память, процесс завершился) и ничего не доказал.
+    source - откуда взято толкание: 'plan', 'near', 'cache', 'search' или 'background'"""
+
+    def __init__(self, status, box=None, direction=None, moves=None, source=None):
+        self.status = status
+        self.box = box
+        self.direction = direction
+        self.moves = moves or []
+        self.source = source
+
+    def __repr__(self):
+        return f"Hint({self.status}, box={self.box}, direction={self.direction}, source={self.source})"
+
+
+class _DeadlineHeuristic:
+    """Эвристика короткого поиска: после deadline каждый потомок отсекается, так что поиск
+    останавливается на ближайшем потомке, а не после раскрытия целого узла. expired - дедлайн сработал"""
+
+    integral = True
+
+    def __init__(self, heuristic):
+        self.heuristic = heuristic
+        self.deadline = INF
+        self.expired = False
+
+    def prepare(self, board):
+        self.heuristic.prepare(board)
+
+    def estimate(self, player, boxes, parent=None):
+        if time.perf_counter() >= self.deadline:
+            self.expired = True
+            return None
+        return self.heuristic.estimate(player, boxes, parent)
+
+
+class HintEngine:
+    """Следующее толкание из текущей позиции без полного перерешивания.
+
+    Последнее решение хранится как план: позиции (ящики, нормализованная область игрока) на его пути.
+    Если игрок на плане - ответ сразу; если в пределах near_pushes толканий от плана - короткий перебор
+    до него; иначе кэш решений и поиск по толканиям на time_limit секунд. Если его не хватило, поиск
+    продолжается в фоновом процессе, а hint отвечает 'searching', пока тот не найдет решение"""
+
+    def __init__(self, solutions=None, time_limit=0.06, near_pushes=2):
+        self.solutions = solutions
+        self.time_limit = time_limit
+        self.near_pushes = near_pushes
+        self.heuristic = _DeadlineHeuristic(MatchingHeuristic())
+        self.solver = PushSolver(self.heuristic, verbose=False)
+        self.solver.progress_interval = 1
+        self.board = None
+        self.plan = {}
+        self.task = None
+        self.task_position = None
+
+    def hint(self, level):
+        if level.check_win():
+            return Hint('solved')
+        board = level.board
+        if board != self.board:
+            self.cancel()
+            self.board = board
+            self.plan = {}
+            self.solver.deadlocks.prepare(board)
+            self.heuristic.prepare(board)
+        if self.is_deadlocked(level):
+            return Hint('deadlocked')
+
+        position = self.position(level.player, level.boxes)
+        source = 'plan'
+        if self.task is not None and self.task.poll():
+            if self.task.result is not None:
+                self.learn(self.task.level, self.task.result, self.task.progress.expanded, self.task.elapsed)
+                source = 'background'
+            elif position == self.task_position:
+                # тупик доказан, только если поиск перебрал все состояния, а не был прерван
+                cancelled = self.task.progress.cancelled
+                self.task = None
+                return Hint('unavailable' if cancelled else 'deadlocked')
+            self.task = None
+
+        push = self.plan.get(position)
+        if push is not None:
+            return self.make_hint(level, push, source)
+        push = self.near_plan(level)
+        if push is not None:
+            return self.make_hint(level, push, 'near')
+        if self.task is not None and position == self.task_position:
+            return Hint('searching')
+
+        if self.solutions is not None:
+            moves = self.solutions.get(level)
+            if moves is not None:
+                self.remember(level, moves)
+                return self.plan_hint(level, 'cache')
+
+        self.heuristic.deadline = time.perf_counter() + self.time_limit
+        self.heuristic.expired = False
+        self.solver.progress = lambda progress: not self.heuristic.expired
+        try:
+            moves = self.solver.solve(level)
+        finally:
+            self.heuristic.deadline = INF
+        if moves is not None:
+            self.learn(level, moves, self.solver.stats.expanded, self.solver.stats.elapsed)
+            return self.plan_hint(level, 'search')
+        if not self.heuristic.expired:
+            return Hint('deadlocked')
+
+        # короткого поиска не хватило - продолжаем без ограничения по времени в фоне
+        self.cancel()
+        self.task = SolveTask(quick_solver(verbose=False), level)
+        self.task_position = position
+        return Hint('searching')
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def position(self, player, boxes):
+        return boxes, self.board.reachable(player, boxes)[1]
+
+    def is_deadlocked(self, level):
+        deadlocks = self.solver.deadlocks
+        if any(deadlocks.is_deadlocked(level.player, level.boxes, box) for box in iter_bits(level.boxes)):
+            return True
+        return self.heuristic.estimate(level.player, level.boxes) is None
+
+    def learn(self, level, moves, states=None, seconds=None):
+        self.remember(level, moves)
+        if self.solutions is not None:
+            self.solutions.put(level, moves, states, seconds)
+
+    def remember(self, level, moves):
+        """Заменяет план позициями на пути решения moves из level"""
+        self.plan = {}
+        current = level.copy()
+        done = 0
+        for box, d, after in moves_to_pushes(level, moves):
+            self.plan[self.position(current.player, current.boxes)] = (box, d)
+            for step in moves[done:after]:
+                current.move_player(*step)
+            done = after
+
+    def plan_hint(self, level, source):
+        return self.make_hint(level, self.plan[self.position(level.player, level.boxes)], source)
+
+    def near_plan(self, level):
+        """Первое толкание кратчайшего (до near_pushes) пути по толканиям к позиции плана"""
+        if not self.plan:
+            return None
+        layer = [(level.player, level.boxes, None)]
+        seen = {self.position(level.player, level.boxes)}
+        for _ in range(self.near_pushes):
+            next_layer = []
+            for player, boxes, first in layer:
+                for box, d, new_boxes in self.pushes(player, boxes):
+                    position = self.position(box, new_boxes)
+                    if position in seen:
+                        continue
+                    seen.add(position)
+                    push = first or (box, d)
+                    if position in self.plan:
+                        return push
+                    next_layer.append((box, new_boxes, push))
+            layer = next_layer
+        return None
+
+    def pushes(self, player, boxes):
+        """Допустимые толкания (клетка ящика, направление, новые ящики) без тупиков"""
+        deadlocks = self.solver.deadlocks
+        cells, _ = self.board.reachable(player, boxes)
+        for box, d, target, new_boxes in self.board.pushes(cells, boxes):
+            if not deadlocks.is_deadlocked(box, new_boxes, target):
+                yield box, d, new_boxes
+
+    def make_hint(self, level, push, source):
+        """push - (клетка ящика до толкания, направление)"""
+        box, d = push
+        dx, dy = DIRECTIONS[d]
+        board = self.board
+        start = box - dx - dy * board.width
+        moves = board.walk(level.player, start, level.boxes) + [(dx, dy)]
+        return Hint('push', box, d, moves, source)
@@ -0,0 +1,85 @@
+from src.level import DIRECTIONS, DIRECTION_INDEX
+
+# буквы LURD по индексу направления; толкание пишется заглавной буквой
+LURD = ''.join({(0, 1): 'd', (1, 0): 'r', (0, -1): 'u', (-1, 0): 'l'}[direction] for direction in DIRECTIONS)
+
+
+class MoveHistory:
+    """Журнал ходов для отмены и повтора: байт на ход (направление << 1 | толкнул ли ящик).
+    Ходы до cursor сделаны, после него - отмененные и доступные для повтора"""
+
+    def __init__(self):
+        self.entries = bytearray()
+        self.cursor = 0
+
+    def __len__(self):
+        return self.cursor
+
+    def move(self, level, dx, dy):
+        """Ход игрока с записью в журнал; новый ход отбрасывает отмененные"""
+        boxes = level.boxes
+        if not level.move_player(dx, dy):
+            return False
+        del self.entries[self.cursor:]
+        self.entries.append(DIRECTION_INDEX[dx, dy] << 1 | (level.boxes != boxes))
+        self.cursor += 1
+        return True
+
+    def undo(self, level):
+        if not self.cursor:
+            return False
+        self.cursor -= 1
+        entry = self.entries[self.cursor]
+        level.undo_move(*DIRECTIONS[entry >> 1], entry & 1)
+        return True
+
+    def redo(self, level):
+        if self.cursor == len(self.entries):
+            return False
+        level.move_player(*DIRECTIONS[self.entries[self.cursor] >> 1])
+        self.cursor += 1
+        return True
+
+    def rewind(self, level):
+        """Отменяет все ходы; их по-прежнему можно повторить"""
+        while self.undo(level):
+            pass
+
+    def clear(self):
+        self.entries.clear()
+        self.cursor = 0
+
+    def to_lurd(self):
+        """Сделанные ходы в нотации LURD"""
+        return ''.join(LURD[entry >> 1].upper() if entry & 1 else LURD[entry >> 1]
+                       for entry in self.entries[:self.cursor])
+
+    def replay(self, level, lurd):
+        """Выполняет ходы LURD из текущей позиции level; ValueError при неизвестной букве или
+        невозможном ходе (ходы до ошибки остаются сделанными)"""
+        for i, char in enumerate(lurd):
+            if char.isspace():
+                continue
+            d = LURD.find(char.lower())
+            if d < 0:
+                raise ValueError(f"Неизвестный ход {char!r} в позиции {i}")
+            boxes = level.boxes
+            if not self.move(level, *DIRECTIONS[d]):
+                raise ValueError(f"Ход {char!r} в позиции {i} невозможен")
+            if (level.boxes != boxes) != char.isupper():
+                # толкание там, где записан простой ход, или наоборот: сам ход в журнале не остается
+                self.undo(level)
+                del self.entries[self.cursor:]
+                raise ValueError(f"Ход {char!r} в позиции {i} невозможен")
+
+    def save(self, path):
+        with open(path, 'w') as file:
+            file.write(self.to_lurd() + '\n')
+
+    def load(self, level, path):
+        """Заменяет журнал ходами из файла: позиция level возвращается к началу и ходы повторяются"""
+        with open(path) as file:
+            lurd = file.read()
+        self.rewind(level)
+        self.clear()
+        self.replay(level, lurd)
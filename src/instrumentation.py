@@ -0,0 +1,169 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+
+class SolverStats:
+    """Счетчики одного поиска. Один и тот же объект получают callback progress, GUI, CLI и замеры.
+    Время по частям поиска заполняется, только если инструментирование включает замер времени.
+    cancelled - причина прерывания поиска: 'progress' (callback вернул False), 'memory' (исчерпан
+    memory_limit), 'process' (фоновый процесс солвера завершился без результата) или False,
+    если поиск не прерывался"""
+    __slots__ = ('expanded', 'generated', 'duplicates', 'pruned', 'frontier', 'max_frontier', 'visited',
+                 'bound', 'elapsed', 'cancelled', 'expand_time', 'hash_time', 'queue_time', 'push_time',
+                 'deadlock_time', 'heuristic_time')
+
+    def __init__(self, expanded=0, frontier=0, visited=0, bound=0):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+        self.expanded = expanded
+        self.frontier = frontier
+        self.visited = visited
+        self.bound = bound
+        self.cancelled = False
+
+    @property
+    def movegen_time(self):
+        """Время раскрытия узлов без хеширования, проверок тупиков, эвристики и вставки в очередь"""
+        return max(0, self.expand_time - self.hash_time - self.deadlock_time - self.heuristic_time - self.push_time)
+
+    @property
+    def rate(self):
+        return self.expanded / self.elapsed if self.elapsed else 0
+
+    def copy(self):
+        stats = SolverStats()
+        for name in self.__slots__:
+            setattr(stats, name, getattr(self, name))
+        return stats
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['movegen_time'] = self.movegen_time
+        return data
+
+    def __repr__(self):
+        return f"expanded={self.expanded} frontier={self.frontier} visited={self.visited} bound={self.bound}"
+
+
+class Instrumentation:
+    """Инструментирование по умолчанию: ничего не делает и не замедляет поиск"""
+
+    timed = False
+
+    def begin(self, solver):
+        pass
+
+    def end(self, solver):
+        pass
+
+
+class _Timed:
+    """Обертка над объектом, которая прибавляет время вызова выбранных методов к полю SolverStats"""
+
+    def __init__(self, target, stats, methods):
+        self._target = target
+        for name, field in methods.items():
+            setattr(self, name, self._wrap(getattr(target, name), stats, field))
+
+    @staticmethod
+    def _wrap(method, stats, field):
+        clock = time.perf_counter
+
+        def timed(*args):
+            started = clock()
+            result = method(*args)
+            setattr(stats, field, getattr(stats, field) + clock() - started)
+            return result
+        return timed
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __len__(self):
+        return len(self._target)
+
+
+class StatsCollector(Instrumentation):
+    """Собирает SolverStats каждого поиска в runs. С timed=True на время поиска оборачивает очередь,
+    хеширование, проверку тупиков и эвристику, чтобы разложить время по частям. Солверы с
+    timed_parts = False (поиск в других процессах) получают только итоговые SolverStats"""
+
+    def __init__(self, timed=True):
+        self.timed = timed
+        self.runs = []
+        self._originals = None
+
+    @property
+    def last(self):
+        return self.runs[-1] if self.runs else None
+
+    def begin(self, solver):
+        if not self.timed or not getattr(solver, 'timed_parts', True):
+            return
+        stats = solver.stats
+        self._originals = {name: solver.__dict__.get(name) for name in
+                           ('open', 'zobrist', 'deadlocks', 'heuristic', 'child_key')}
+        solver.open = _Timed(solver.open, stats, {'push': 'push_time', 'pop': 'queue_time'})
+        solver.zobrist = _Timed(solver.zobrist, stats,
+                                {'hash': 'hash_time', 'hash_boxes': 'hash_time', 'push': 'hash_time'})
+        solver.deadlocks = _Timed(solver.deadlocks, stats, {'is_deadlocked': 'deadlock_time'})
+        if getattr(solver, 'heuristic', None) is not None:
+            solver.heuristic = _Timed(solver.heuristic, stats, {'estimate': 'heuristic_time'})
+        solver.child_key = _Timed._wrap(solver.child_key, stats, 'hash_time')
+
+    def end(self, solver):
+        if self._originals is not None:
+            for name, value in self._originals.items():
+                if value is None:
+                    solver.__dict__.pop(name, None)
+                else:
+                    setattr(solver, name, value)
+            self._originals = None
+            # вставки в очередь тоже время очереди
+            solver.stats.queue_time += solver.stats.push_time
+        self.runs.append(solver.stats.copy())
+
+
+class ProfileReport:
+    def __init__(self, solution, stats, profile, memory_peak=None, allocations=None):
+        self.solution = solution
+        self.stats = stats
+        self.profile = profile
+        self.memory_peak = memory_peak
+        self.allocations = allocations or []
+
+    def __str__(self):
+        lines = [f"Solved: {self.solution is not None}, {self.stats}",
+                 f"Elapsed: {self.stats.elapsed:.3f}s, {self.stats.rate:.0f} states/s"]
+        if self.memory_peak is not None:
+            lines.append(f"Peak traced memory: {self.memory_peak / 1024 / 1024:.1f} MB")
+            lines.extend(str(allocation) for allocation in self.allocations)
+        lines.append(self.profile)
+        return '\n'.join(lines)
+
+
+def profile_solve(solver, level, memory=False, limit=25):
+    """Один поиск под cProfile (и tracemalloc, если memory=True) с полным сбором SolverStats"""
+    instrumentation = solver.instrumentation
+    solver.instrumentation = StatsCollector(timed=True)
+    profiler = cProfile.Profile()
+    if memory:
+        tracemalloc.start()
+    try:
+        solution = profiler.runcall(solver.solve, level)
+        memory_peak = allocations = None
+        if memory:
+            _, memory_peak = tracemalloc.get_traced_memory()
+            allocations = tracemalloc.take_snapshot().statistics('lineno')[:10]
+    finally:
+        if memory:
+            tracemalloc.stop()
+        stats = solver.instrumentation.last
+        solver.instrumentation = instrumentation
+
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+    return ProfileReport(solution, stats, output.getvalue(), memory_peak, allocations)
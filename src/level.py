@@ -1,12 +1,201 @@
+from collections import deque
+
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+FLOOR_TILES = ' -_'
+
+
+class Board:
+    """Статическая часть уровня: стены и цели, общая для всех состояний"""
+    __slots__ = ('width', 'height', 'size', 'walls', 'goals', 'bits', 'steps', 'template')
+
+    def __init__(self, width, height, walls, goals):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.walls = walls
+        self.goals = goals
+        self.bits = [1 << i for i in range(self.size)]
+
+        # steps[d][i] - индекс соседней клетки в направлении d или -1 за границей поля
+        self.steps = []
+        for dx, dy in DIRECTIONS:
+            table = []
+            for i in range(self.size):
+                x, y = i % width + dx, i // width + dy
+                table.append(y * width + x if 0 <= x < width and 0 <= y < height else -1)
+            self.steps.append(table)
+
+        self.template = []
+        for i in range(self.size):
+            if walls & self.bits[i]:
+                self.template.append('#')
+            elif goals & self.bits[i]:
+                self.template.append('.')
+            else:
+                self.template.append(' ')
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def coords(self, i):
+        return i % self.width, i // self.width
+
+    def is_wall(self, i):
+        return i < 0 or bool(self.walls & self.bits[i])
+
+    def reachable(self, player, boxes):
+        """Клетки, до которых игрок доходит без толкания ящиков, и нормализованная (минимальная) из них"""
+        blocked = self.walls | boxes
+        bits = self.bits
+        seen = bits[player]
+        cells = [player]
+        for cell in cells:
+            for step in self.steps:
+                nxt = step[cell]
+                if nxt >= 0 and not blocked & bits[nxt] and not seen & bits[nxt]:
+                    seen |= bits[nxt]
+                    cells.append(nxt)
+        return cells, min(cells)
+
+    def pushes(self, cells, boxes):
+        """Толкания, доступные игроку из клеток cells: (клетка ящика, направление, куда, новые ящики).
+        Тупики не проверяются"""
+        bits = self.bits
+        walls = self.walls
+        for cell in cells:
+            for d, step in enumerate(self.steps):
+                box = step[cell]
+                if box < 0 or not boxes & bits[box]:
+                    continue
+                target = step[box]
+                if target < 0 or walls & bits[target] or boxes & bits[target]:
+                    continue
+                yield box, d, target, boxes ^ bits[box] ^ bits[target]
+
+    def walk(self, start, target, boxes):
+        """Кратчайший путь игрока без толканий в виде списка (dx, dy), None если клетка недостижима"""
+        if start == target:
+            return []
+        blocked = self.walls | boxes
+        bits = self.bits
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            for d, step in enumerate(self.steps):
+                nxt = step[cell]
+                if nxt < 0 or nxt in came_from or blocked & bits[nxt]:
+                    continue
+                came_from[nxt] = (cell, d)
+                if nxt == target:
+                    path = []
+                    while came_from[nxt] is not None:
+                        nxt, d = came_from[nxt]
+                        path.append(DIRECTIONS[d])
+                    path.reverse()
+                    return path
+                queue.append(nxt)
+        return None
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return False
+        return (self.width, self.walls, self.goals) == (other.width, other.walls, other.goals)
+
+    def __hash__(self):
+        return hash((self.width, self.walls, self.goals))
+
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def parse_rows(level_data):
+    """Разбирает строки уровня на статическую доску, позицию игрока и маску ящиков"""
+    width = max((len(row) for row in level_data), default=0)
+    height = len(level_data)
+    walls = goals = boxes = 0
+    player = -1
+    for y, row in enumerate(level_data):
+        for x, char in enumerate(row.ljust(width)):
+            bit = 1 << (y * width + x)
+            if char in '.*+':
+                goals |= bit
+            if char in '$*':
+                boxes |= bit
+            elif char in '@+':
+                player = y * width + x
+            elif char == '#' or char not in FLOOR_TILES + '.':
+                walls |= bit
+    return Board(width, height, walls, goals), player, boxes
+
+
 class Level:
+    """Позиция на доске. off_goal - число ящиков не на целях, обновляется при каждом ходе,
+    поэтому check_win не смотрит на доску"""
+    __slots__ = ('board', 'player', 'boxes', 'moves_count', 'off_goal')
+
     def __init__(self, level_data):
-        max_width = max(len(row) for row in level_data)
-        self.data = [row.ljust(max_width) for row in level_data]
-        self.width = max_width
-        self.height = len(self.data)
-        self.find_player()
+        self.data = level_data
         self.moves_count = 0
 
+    @classmethod
+    def from_state(cls, board, player, boxes, moves_count=0):
+        level = cls.__new__(cls)
+        level.board = board
+        level.player = player
+        level.boxes = boxes
+        level.moves_count = moves_count
+        level.off_goal = bin(boxes & ~board.goals).count('1')
+        return level
+
+    def copy(self):
+        level = Level.__new__(Level)
+        level.board = self.board
+        level.player = self.player
+        level.boxes = self.boxes
+        level.moves_count = self.moves_count
+        level.off_goal = self.off_goal
+        return level
+
+    @property
+    def state(self):
+        return self.player, self.boxes
+
+    @property
+    def width(self):
+        return self.board.width
+
+    @property
+    def height(self):
+        return self.board.height
+
+    @property
+    def player_pos(self):
+        if self.player < 0:
+            return None
+        return self.board.coords(self.player)
+
+    @property
+    def data(self):
+        board = self.board
+        tiles = list(board.template)
+        for i in iter_bits(self.boxes):
+            tiles[i] = '*' if board.goals & board.bits[i] else '$'
+        if self.player >= 0:
+            tiles[self.player] = '+' if board.goals & board.bits[self.player] else '@'
+        return [''.join(tiles[y * board.width:(y + 1) * board.width]) for y in range(board.height)]
+
+    @data.setter
+    def data(self, level_data):
+        self.board, self.player, self.boxes = parse_rows(level_data)
+        self.off_goal = bin(self.boxes & ~self.board.goals).count('1')
+
     def print_board(self):
         """Выводит текущее состояние доски в консоль"""
         print("\n" + "=" * (self.width + 4))
@@ -17,73 +206,70 @@ class Level:
         print(f"Сделано ходов: {self.moves_count}\n")
 
     def find_player(self):
-        self.player_pos = None
-        for y, row in enumerate(self.data):
-            for x, char in enumerate(row):
-                if char in '@+':
-                    self.player_pos = (x, y)
-                    return
+        return self.player_pos
 
     def check_win(self):
-        return not any('$' in row for row in self.data)
+        return not self.off_goal
 
     def get_tile(self, x, y):
-        if 0 <= y < self.height and 0 <= x < self.width:
-            return self.data[y][x]
-        return '#'
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            return '#'
+        i = self.board.index(x, y)
+        bit = self.board.bits[i]
+        on_goal = self.board.goals & bit
+        if i == self.player:
+            return '+' if on_goal else '@'
+        if self.boxes & bit:
+            return '*' if on_goal else '$'
+        return self.board.template[i]
 
     def move_player(self, dx, dy):
-        if not self.player_pos:
+        if self.player < 0:
             return False
 
-        p_from = {"+": ".", "@": " "}
-        p_to = {"$": "@", " ": "@", "*": "+", ".": "+"}
-        box_to = {".": "*", " ": "$"}
-
-        px, py = self.player_pos
-        nx, ny = px + dx, py + dy
-        nnx, nny = nx + dx, ny + dy
-
-        current = self.get_tile(px, py)
-        next_tile = self.get_tile(nx, ny)
-        next_next_tile = self.get_tile(nnx, nny)
-
-        new_data = [list(row) for row in self.data]
-
-        if next_tile in "$*":
-            if next_next_tile in box_to:
-                new_data[py][px] = p_from[current]
-                new_data[ny][nx] = p_to[next_tile]
-                new_data[nny][nnx] = box_to[next_next_tile]
-                self.data = [''.join(row) for row in new_data]
-                self.player_pos = (nx, ny)
-                self.moves_count += 1
-                return True
+        board = self.board
+        step = board.steps[DIRECTION_INDEX[dx, dy]]
+        bits = board.bits
+
+        target = step[self.player]
+        if target < 0 or board.walls & bits[target]:
             return False
 
+        if self.boxes & bits[target]:
+            behind = step[target]
+            if behind < 0 or board.walls & bits[behind] or self.boxes & bits[behind]:
+                return False
+            self.boxes ^= bits[target] | bits[behind]
+            self.off_goal += (not board.goals & bits[behind]) - (not board.goals & bits[target])
 
-        if next_tile in " .":
-            new_data[py][px] = p_from[current]
-            new_data[ny][nx] = p_to[next_tile]
-            self.data = [''.join(row) for row in new_data]
-            self.player_pos = (nx, ny)
-            self.moves_count += 1
-            return True
+        self.player = target
+        self.moves_count += 1
+        return True
 
-        return False
+    def undo_move(self, dx, dy, pushed):
+        """Обратный ход: игрок отступает против (dx, dy) и, если ход был толканием, тянет ящик за собой"""
+        board = self.board
+        step = board.steps[DIRECTION_INDEX[dx, dy]]
+        previous = board.steps[DIRECTION_INDEX[-dx, -dy]][self.player]
+        if pushed:
+            box = step[self.player]
+            self.boxes ^= board.bits[box] | board.bits[self.player]
+            self.off_goal += (not board.goals & board.bits[self.player]) - (not board.goals & board.bits[box])
+        self.player = previous
+        self.moves_count -= 1
 
     @staticmethod
     def from_file(filename):
         with open(filename, 'r') as file:
             return Level([line.rstrip() for line in file.readlines()])
-    
+
     def __eq__(self, other):
         if not isinstance(other, Level):
             return False
-        return self.data == other.data
+        return self.player == other.player and self.boxes == other.boxes and self.board == other.board
 
     def __hash__(self):
-        return hash(tuple(self.data))
-    
+        return hash((self.player, self.boxes))
+
     def __lt__(self, other):
         return self.moves_count < other.moves_count
@@ -0,0 +1,157 @@
+from collections import OrderedDict, deque
+
+from src.level import DIRECTIONS, iter_bits
+
+INF = float('inf')
+
+# направления влево-вправо и вверх-вниз
+HORIZONTAL = (DIRECTIONS.index((-1, 0)), DIRECTIONS.index((1, 0)))
+VERTICAL = (DIRECTIONS.index((0, -1)), DIRECTIONS.index((0, 1)))
+
+
+def push_distances(board):
+    """Для каждой цели - число толканий, за которое ящик из клетки i доходит до нее без учета других ящиков"""
+    bits = board.bits
+    walls = board.walls
+    reverse = [board.steps[DIRECTIONS.index((-dx, -dy))] for dx, dy in DIRECTIONS]
+
+    distances = {}
+    for goal in iter_bits(board.goals):
+        dist = [INF] * board.size
+        dist[goal] = 0
+        queue = deque([goal])
+        while queue:
+            cell = queue.popleft()
+            for back in reverse:
+                # ящик пришел из prev, игрок толкал его из клетки за prev
+                prev = back[cell]
+                if prev < 0 or walls & bits[prev] or dist[prev] != INF:
+                    continue
+                player = back[prev]
+                if player < 0 or walls & bits[player]:
+                    continue
+                dist[prev] = dist[cell] + 1
+                queue.append(prev)
+        distances[goal] = dist
+    return distances
+
+
+def dead_squares(board, distances=None):
+    """Клетки, из которых ящик не может попасть ни на одну цель"""
+    if distances is None:
+        distances = push_distances(board)
+    dead = 0
+    for i in range(board.size):
+        if not board.walls & board.bits[i] and all(dist[i] == INF for dist in distances.values()):
+            dead |= board.bits[i]
+    return dead
+
+
+class LevelAnalysis:
+    """Статический разбор доски, общий для всех поисков и проверок на одном уровне. Только для чтения.
+
+    goals - список целей, distances[i][k] - толканий от клетки i до goals[k], nearest[i] - до ближайшей цели,
+    dead - маска мертвых клеток, component[i] - номер связной области пола (-1 для стен),
+    tunnels - клетки пола со стенами с двух противоположных сторон, articulations - клетки пола,
+    без которых область пола распадается"""
+
+    def __init__(self, board):
+        self.board = board
+        self.steps = board.steps
+        goal_distances = push_distances(board)
+        self.goals = tuple(goal_distances)
+        self.distances = tuple(tuple(goal_distances[goal][i] for goal in self.goals) for i in range(board.size))
+        self.nearest = tuple(min(row, default=INF) for row in self.distances)
+        self.dead = dead_squares(board, goal_distances)
+        self.floor = tuple(i for i in range(board.size) if not board.walls & board.bits[i])
+        self.component = tuple(self._components())
+        self.tunnels = self._tunnels()
+        self.articulations = self._articulations()
+
+    def connected(self, a, b):
+        """Игрок может дойти из a в b, если не мешают ящики"""
+        return self.component[a] >= 0 and self.component[a] == self.component[b]
+
+    def _components(self):
+        board = self.board
+        component = [-1] * board.size
+        count = 0
+        for start in self.floor:
+            if component[start] >= 0:
+                continue
+            component[start] = count
+            queue = [start]
+            for cell in queue:
+                for step in self.steps:
+                    nxt = step[cell]
+                    if nxt >= 0 and component[nxt] < 0 and not board.walls & board.bits[nxt]:
+                        component[nxt] = count
+                        queue.append(nxt)
+            count += 1
+        return component
+
+    def _tunnels(self):
+        board = self.board
+        tunnels = 0
+        for cell in self.floor:
+            for first, second in (HORIZONTAL, VERTICAL):
+                if board.is_wall(self.steps[first][cell]) and board.is_wall(self.steps[second][cell]):
+                    tunnels |= board.bits[cell]
+        return tunnels
+
+    def _articulations(self):
+        """Точки сочленения графа клеток пола (итеративный алгоритм Тарьяна)"""
+        board = self.board
+        order = [-1] * board.size
+        low = [0] * board.size
+        articulations = 0
+        counter = 0
+        for root in self.floor:
+            if order[root] >= 0:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            root_children = 0
+            stack = [(root, -1, iter(self.steps))]
+            while stack:
+                cell, parent, steps = stack[-1]
+                for step in steps:
+                    nxt = step[cell]
+                    if nxt < 0 or board.walls & board.bits[nxt]:
+                        continue
+                    if order[nxt] < 0:
+                        order[nxt] = low[nxt] = counter
+                        counter += 1
+                        stack.append((nxt, cell, iter(self.steps)))
+                        break
+                    if nxt != parent:
+                        low[cell] = min(low[cell], order[nxt])
+                else:
+                    stack.pop()
+                    if parent < 0:
+                        continue
+                    low[parent] = min(low[parent], low[cell])
+                    if parent == root:
+                        root_children += 1
+                    elif low[cell] >= order[parent]:
+                        articulations |= board.bits[parent]
+            if root_children > 1:
+                articulations |= board.bits[root]
+        return articulations
+
+
+_cache = OrderedDict()
+CACHE_SIZE = 16
+
+
+def analyze(board):
+    """LevelAnalysis доски из LRU-кэша: повторные поиски на том же уровне не пересчитывают разбор"""
+    key = (board.width, board.height, board.walls, board.goals)
+    analysis = _cache.get(key)
+    if analysis is not None:
+        _cache.move_to_end(key)
+        return analysis
+    analysis = _cache[key] = LevelAnalysis(board)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return analysis
@@ -1,5 +1,9 @@
 import random
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from src.deadlock import DeadlockDetector
+from src.level import Board, iter_bits, parse_rows
+from src.level_analysis import analyze
 
 class LevelGenerator:
     def __init__(self, width: int = 6, height: int = 6):
@@ -8,8 +12,107 @@ class LevelGenerator:
         self.wall_chance = 0.3
         self.box_chance = 0.25
         self.target_chance = 0.2
+        # число обратных ходов (перетаскиваний); 0 - случайная расстановка с отбраковкой
+        self.pulls = 0
+        # предел числа ящиков обратной генерации: с большим числом солвер не справляется,
+        # и подсказки и решение по S на таком уровне не работают
+        self.max_boxes = 8
 
     def generate(self) -> List[str]:
+        while True:
+            if self.pulls > 0:
+                level = self._generate_reverse()
+            else:
+                level = self._generate_candidate()
+            if level is not None:
+                return level
+
+    def _generate_reverse(self) -> Optional[List[str]]:
+        """Уровень, решаемый по построению: ящики ставятся на цели и разводятся обратными ходами -
+        игрок тянет ящик за собой. Решение - те же ходы в обратном порядке, поэтому солвер не нужен,
+        а время генерации линейно по числу перетаскиваний. Ящиков (и целей) - доля box_chance клеток пола,
+        но не больше max_boxes"""
+        board = self._random_board()
+        bits = board.bits
+        floor = [i for i in range(board.size) if not board.walls & bits[i]]
+        goal_count = max(1, min(self.max_boxes, round(len(floor) * self.box_chance)))
+        if len(floor) < goal_count + 2:
+            return None
+
+        goals = random.sample(floor, goal_count)
+        board = Board(board.width, board.height, board.walls, sum(bits[goal] for goal in goals))
+        boxes = board.goals
+        player = random.choice([cell for cell in floor if not boxes & bits[cell]])
+
+        _, pulls = self._pulls(board, player, boxes)
+        for _ in range(self.pulls):
+            if not pulls:
+                break
+            # предпочитаем ходы, после которых у игрока остается большая область и есть что тянуть дальше,
+            # иначе случайная игра быстро загоняет игрока в тупик
+            options = []
+            for box, cell, behind in pulls:
+                next_boxes = boxes ^ bits[box] ^ bits[cell]
+                area, next_pulls = self._pulls(board, behind, next_boxes)
+                options.append((area if next_pulls else 0, next_boxes, behind, next_pulls))
+            best = max(option[0] for option in options)
+            _, boxes, player, pulls = random.choice([option for option in options if option[0] * 4 >= best * 3])
+
+        if not boxes & ~board.goals:
+            return None
+
+        rows = [list(board.template[y * board.width:(y + 1) * board.width]) for y in range(board.height)]
+        for cell in iter_bits(boxes):
+            x, y = board.coords(cell)
+            rows[y][x] = '*' if board.goals & bits[cell] else '$'
+        x, y = board.coords(player)
+        rows[y][x] = '+' if board.goals & bits[player] else '@'
+        return [''.join(row) for row in rows]
+
+    @staticmethod
+    def _pulls(board: Board, player: int, boxes: int) -> Tuple[int, List[Tuple[int, int, int]]]:
+        """Размер области игрока и все перетаскивания из нее: (ящик, клетка игрока, куда игрок отходит)"""
+        bits = board.bits
+        pulls = []
+        cells, _ = board.reachable(player, boxes)
+        for cell in cells:
+            for d, step in enumerate(board.steps):
+                # игрок отходит из cell на шаг вперед, а ящик с противоположной стороны едет за ним
+                behind = step[cell]
+                box = board.steps[(d + 2) % 4][cell]
+                if behind < 0 or box < 0 or not boxes & bits[box]:
+                    continue
+                if board.walls & bits[behind] or boxes & bits[behind]:
+                    continue
+                pulls.append((box, cell, behind))
+        return len(cells), pulls
+
+    def _random_board(self) -> Board:
+        """Стены по периметру и случайные стены внутри; стена не ставится, если она разрывает пол на части"""
+        walls = 0
+        interior = []
+        for y in range(self.height):
+            for x in range(self.width):
+                if x in (0, self.width - 1) or y in (0, self.height - 1):
+                    walls |= 1 << (y * self.width + x)
+                else:
+                    interior.append(y * self.width + x)
+        floor_count = len(interior)
+
+        random.shuffle(interior)
+        for cell in interior:
+            # последняя клетка пола остается полом
+            if floor_count <= 1 or random.random() >= self.wall_chance:
+                continue
+            board = Board(self.width, self.height, walls | (1 << cell), 0)
+            start = next(i for i in interior if i != cell and not board.walls & board.bits[i])
+            area, _ = board.reachable(start, 0)
+            if len(area) == floor_count - 1:
+                walls = board.walls
+                floor_count -= 1
+        return Board(self.width, self.height, walls, 0)
+
+    def _generate_candidate(self) -> Optional[List[str]]:
         level = [[' ' for _ in range(self.width)] for _ in range(self.height)]
         
         for i in range(self.height):
@@ -41,7 +144,7 @@ class LevelGenerator:
                     targets.append((x, y))
 
         if not targets:
-            return self.generate()
+            return None
 
         boxes = []
         for y in range(1, self.height - 1):
@@ -62,7 +165,7 @@ class LevelGenerator:
             level[y][x] = ' '
 
         if not self._is_solvable(level, player_x, player_y, boxes, targets):
-            return self.generate()
+            return None
 
         return [''.join(row) for row in level]
 
@@ -71,47 +174,17 @@ class LevelGenerator:
         for box_x, box_y in boxes:
             if (box_x, box_y) in targets:
                 return False
-        
-        for box_x, box_y in boxes:
-            if not self._is_reachable(level, player_x, player_y, box_x, box_y):
-                return False
-                
-        for target_x, target_y in targets:
-            if not self._is_reachable(level, player_x, player_y, target_x, target_y):
+
+        board, player, box_mask = parse_rows([''.join(row) for row in level])
+        analysis = analyze(board)
+        for x, y in boxes + targets:
+            if not analysis.connected(player, board.index(x, y)):
                 return False
-                
+
+        deadlocks = DeadlockDetector()
+        deadlocks.prepare(board)
         for box_x, box_y in boxes:
-            if self._is_corner(level, box_x, box_y):
+            if deadlocks.is_deadlocked(player, box_mask, board.index(box_x, box_y)):
                 return False
-                
-        return True
 
-    def _is_reachable(self, level: List[List[str]], start_x: int, start_y: int, 
-                     end_x: int, end_y: int) -> bool:
-        visited = set()
-        queue = [(start_x, start_y)]
-        
-        while queue:
-            x, y = queue.pop(0)
-            if (x, y) == (end_x, end_y):
-                return True
-                
-            if (x, y) in visited:
-                continue
-                
-            visited.add((x, y))
-            
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                new_x, new_y = x + dx, y + dy
-                if (0 <= new_x < self.width and 0 <= new_y < self.height and 
-                    level[new_y][new_x] != '#' and (new_x, new_y) not in visited):
-                    queue.append((new_x, new_y))
-                    
-        return False
-
-    def _is_corner(self, level: List[List[str]], x: int, y: int) -> bool:
-        walls = 0
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-            if level[y + dy][x + dx] == '#':
-                walls += 1
-        return walls >= 2 
\ No newline at end of file
+        return True
@@ -0,0 +1,154 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_right
+
+BOARD_CHARS = frozenset(b'#@+$*.-_ ')
+LEVEL_EXTENSIONS = ('.txt', '.xsb', '.sok')
+
+# заголовок индекса: mtime_ns и размер исходного файла, число уровней
+INDEX_HEADER = struct.Struct('<qqq')
+
+
+def is_board_line(line):
+    line = line.rstrip()
+    return b'#' in line and all(char in BOARD_CHARS for char in line)
+
+
+def scan_levels(data):
+    """Смещения (начало, конец) уровней в тексте набора: уровень - непрерывный блок строк поля,
+    все остальное (пустые строки, комментарии ';', Title: и т.п.) разделяет уровни"""
+    offsets = array('q')
+    start = None
+    pos = 0
+    size = len(data)
+    while pos < size:
+        end = data.find(b'\n', pos)
+        end = size if end < 0 else end + 1
+        if is_board_line(data[pos:end]):
+            if start is None:
+                start = pos
+        elif start is not None:
+            offsets.extend((start, pos))
+            start = None
+        pos = end
+    if start is not None:
+        offsets.extend((start, size))
+    return offsets
+
+
+def parse_level(text):
+    lines = [line.rstrip() for line in text.decode('utf-8', 'replace').splitlines()]
+    width = max((len(line) for line in lines), default=0)
+    return [line.ljust(width) for line in lines]
+
+
+class LevelPack:
+    """Один файл с уровнями. Индекс смещений хранится на диске и перестраивается при смене mtime или размера;
+    при открытии читается только заголовок, сами смещения и текст уровней - по требованию через mmap"""
+
+    def __init__(self, path, index_path):
+        self.path = path
+        self.index_path = index_path
+        stat = os.stat(path)
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        self._data = None
+        self._offsets = None
+        self.count = self.read_count()
+        if self.count is None:
+            self.count = self.build_index()
+
+    def read_count(self):
+        try:
+            with open(self.index_path, 'rb') as file:
+                header = file.read(INDEX_HEADER.size)
+        except OSError:
+            return None
+        if len(header) != INDEX_HEADER.size:
+            return None
+        mtime, size, count = INDEX_HEADER.unpack(header)
+        if (mtime, size) != self.stamp:
+            return None
+        return count
+
+    def build_index(self):
+        data = self.data
+        self._offsets = scan_levels(data) if data is not None else array('q')
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(self.index_path, 'wb') as file:
+                file.write(INDEX_HEADER.pack(*self.stamp, len(self._offsets) // 2))
+                self._offsets.tofile(file)
+        except OSError as e:
+            print(f"Warning: could not write level index '{self.index_path}': {e}")
+        return len(self._offsets) // 2
+
+    @property
+    def data(self):
+        if self._data is None and self.stamp[1]:
+            with open(self.path, 'rb') as file:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._offsets = array('q')
+            with open(self.index_path, 'rb') as file:
+                file.seek(INDEX_HEADER.size)
+                self._offsets.fromfile(file, self.count * 2)
+        return self._offsets
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        start, end = self.offsets[2 * i], self.offsets[2 * i + 1]
+        return parse_level(self.data[start:end])
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+
+class LevelRepository:
+    """Все уровни из каталога: по одному в .txt и наборы .xsb/.sok, плюс добавленные в игре.
+    Уровни разбираются только при обращении по индексу"""
+
+    def __init__(self, directory, index_dir=None, extensions=LEVEL_EXTENSIONS):
+        self.directory = directory
+        self.index_dir = index_dir or os.path.join(directory, '.index')
+        self.packs = []
+        self.starts = []
+        self.extra = []
+        self.total = 0
+        for filename in sorted(os.listdir(directory)):
+            if not filename.lower().endswith(extensions):
+                continue
+            pack = LevelPack(os.path.join(directory, filename), os.path.join(self.index_dir, filename + '.idx'))
+            if len(pack):
+                self.starts.append(self.total)
+                self.packs.append(pack)
+                self.total += len(pack)
+
+    def __len__(self):
+        return self.total + len(self.extra)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if i >= self.total:
+            return self.extra[i - self.total]
+        p = bisect_right(self.starts, i) - 1
+        return self.packs[p][i - self.starts[p]]
+
+    def append(self, level):
+        self.extra.append(level)
+
+    def close(self):
+        for pack in self.packs:
+            pack.close()
@@ -1,12 +1,62 @@
+from collections import OrderedDict
+
 import pygame
 
-def load_images(theme):
-    return {
-        '#': pygame.image.load('./themes/' + theme + '/images/wall.png').convert(),
-        ' ': pygame.image.load('./themes/' + theme + '/images/space.png').convert(),
-        '$': pygame.image.load('./themes/' + theme + '/images/box.png').convert(),
-        '.': pygame.image.load('./themes/' + theme + '/images/goal.png').convert(),
-        '@': pygame.image.load('./themes/' + theme + '/images/player.png').convert(),
-        '+': pygame.image.load('./themes/' + theme + '/images/player.png').convert(),
-        '*': pygame.image.load('./themes/' + theme + '/images/box_on_goal.png').convert(),
-    }
+# файл спрайта и символы клеток, которые им рисуются
+SPRITES = [
+    ('wall', '#'),
+    ('space', ' '),
+    ('box', '$'),
+    ('goal', '.'),
+    ('player', '@+'),
+    ('box_on_goal', '*'),
+]
+
+
+class ThemeManager:
+    """Атласы тем: спрайты темы загружаются с диска один раз, масштабируются под размер клетки
+    и складываются в одну поверхность. Готовые атласы хранятся в LRU-кэше по ключу (тема, размер клетки)"""
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.sources = {}
+        self.atlases = OrderedDict()
+
+    def load_sources(self, theme):
+        if theme not in self.sources:
+            self.sources[theme] = [
+                pygame.image.load(f'./themes/{theme}/images/{name}.png') for name, _ in SPRITES]
+        return self.sources[theme]
+
+    def build_atlas(self, theme, tile_size):
+        atlas = pygame.Surface((tile_size * len(SPRITES), tile_size))
+        for i, source in enumerate(self.load_sources(theme)):
+            if source.get_size() != (tile_size, tile_size):
+                source = pygame.transform.smoothscale(source, (tile_size, tile_size))
+            atlas.blit(source, (i * tile_size, 0))
+        return atlas.convert()
+
+    def get(self, theme, tile_size):
+        """Словарь символ клетки -> спрайт (подповерхность атласа)"""
+        key = (theme, tile_size)
+        if key in self.atlases:
+            self.atlases.move_to_end(key)
+            return self.atlases[key][1]
+
+        atlas = self.build_atlas(theme, tile_size)
+        images = {}
+        for i, (_, tiles) in enumerate(SPRITES):
+            sprite = atlas.subsurface((i * tile_size, 0, tile_size, tile_size))
+            for tile in tiles:
+                images[tile] = sprite
+        self.atlases[key] = (atlas, images)
+        while len(self.atlases) > self.capacity:
+            self.atlases.popitem(last=False)
+        return images
+
+
+_themes = ThemeManager()
+
+
+def load_images(theme, tile_size=36):
+    return _themes.get(theme, tile_size)
@@ -0,0 +1,84 @@
+import heapq
+from collections import deque
+from itertools import count
+
+
+class BucketQueue:
+    """Очередь Дейкстры (dial) для целых приоритетов: корзина на каждое значение f,
+    внутри нее - слои по глубине. Берется самый глубокий слой, а в нем узлы по порядку добавления,
+    то есть порядок тот же, что у кучи с ключом (f, -g), но без логарифма на операцию"""
+
+    # память на элемент сверх самого элемента: ссылка в слое deque
+    ENTRY_SIZE = 16
+
+    def __init__(self):
+        self.clear()
+
+    def push(self, item, priority, depth=0):
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append([])
+            self.deepest.append(-1)
+            self.counts.append(0)
+        layers = buckets[priority]
+        while len(layers) <= depth:
+            layers.append(deque())
+        layers[depth].append(item)
+        if depth > self.deepest[priority]:
+            self.deepest[priority] = depth
+        if priority < self.current:
+            self.current = priority
+        self.counts[priority] += 1
+        self.size += 1
+
+    def pop(self):
+        counts = self.counts
+        while not counts[self.current]:
+            self.current += 1
+        priority = self.current
+        layers = self.buckets[priority]
+        depth = self.deepest[priority]
+        while not layers[depth]:
+            depth -= 1
+        self.deepest[priority] = depth
+        counts[priority] -= 1
+        self.size -= 1
+        return priority, layers[depth].popleft()
+
+    def clear(self):
+        self.buckets = []
+        self.deepest = []
+        self.counts = []
+        self.current = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+
+class HeapQueue:
+    """Двоичная куча для произвольных (в том числе дробных) приоритетов, при равенстве - более глубокие узлы"""
+
+    # кортеж (приоритет, -глубина, номер, элемент) и ссылка на него в списке
+    ENTRY_SIZE = 170
+
+    def __init__(self):
+        self.heap = []
+        self.counter = count()
+
+    def push(self, item, priority, depth=0):
+        heapq.heappush(self.heap, (priority, -depth, next(self.counter), item))
+
+    def pop(self):
+        priority, _, _, item = heapq.heappop(self.heap)
+        return priority, item
+
+    def clear(self):
+        self.heap = []
+        self.counter = count()
+
+    def __len__(self):
+        return len(self.heap)
+
+
+OPEN_LISTS = {'bucket': BucketQueue, 'heap': HeapQueue}
@@ -0,0 +1,360 @@
+"""Параллельный поиск по толканиям (HDA*): python -m src.parallel_solver levels/level02.txt --workers 16
+
+Замер масштабирования против PushSolver на одном уровне с одинаковым пределом состояний:
+python -m src.parallel_solver levels/level03.txt --scaling 1,2,4,8 --max-states 20000
+
+Состояния распределены между процессами по хешу расположения ящиков: каждый процесс ведет свою
+очередь и таблицу посещенных и раскрывает только свои состояния, чужих потомков пачками отправляет
+владельцам. Главный процесс хранит лучшее найденное решение и опрашивает процессы; поиск завершается,
+когда ни у одного процесса в очереди нет состояний дешевле решения и нет сообщений в пути"""
+import argparse
+import heapq
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from itertools import count
+
+from src.deadlock import DeadlockDetector
+from src.heuristics import INF, MatchingHeuristic
+from src.instrumentation import Instrumentation, SolverStats
+from src.level import Level
+from src.solver import PushSolver
+from src.transposition import Zobrist
+
+# состояния для чужих процессов копятся и уходят одним сообщением, когда их набралось SEND_BATCH
+# или самое старое ждет дольше SEND_INTERVAL секунд; входящие сообщения разбираются перед каждым
+# раскрытием, чтобы лучшее состояние не ждало, пока владелец раскрывает худшие
+SEND_BATCH = 64
+SEND_INTERVAL = 0.005
+# пауза между опросами процессов и ожидание сообщений в простое, секунд
+PROBE_INTERVAL = 0.02
+REPLY_TIMEOUT = 5
+# примерная память записи parents и состояния в куче процесса, байт
+PARENT_ENTRY_SIZE = 220
+HEAP_ENTRY_SIZE = 400
+
+
+def _worker(index, level, heuristic, deadlocks, memory_limit, inboxes, control):
+    """Процесс поиска: раскрывает состояния, у которых box_key % len(inboxes) == index.
+    Состояние в сообщении - (f, g, игрок, ящики, ключ ящиков, ключ родителя, владелец родителя, толкание).
+    Когда parents и куча превышают memory_limit, процесс сообщает об этом и перестает раскрывать состояния"""
+    workers = len(inboxes)
+    inbox = inboxes[index]
+    board = level.board
+    deadlocks.prepare(board)
+    heuristic.prepare(board)
+    zobrist = Zobrist(board)
+    # ключ -> (стоимость, ключ родителя, владелец родителя, толкание): таблица посещенных и ссылки
+    # для сборки решения. Записи не вытесняются, а ссылка меняется только на более дешевую, поэтому
+    # стоимость вдоль цепочки строго убывает и циклов нет
+    parents = {}
+    heap = []
+    sequence = count()
+    outgoing = [[] for _ in range(workers)]
+    incumbent = INF
+    sent = received = expanded = generated = duplicates = pruned = 0
+
+    player_keys = zobrist.player
+    clock = time.perf_counter
+    pending = 0
+    flushed = clock()
+    idle = True
+    exhausted = False
+
+    while True:
+        while True:
+            try:
+                message = inbox.get(timeout=PROBE_INTERVAL) if idle else inbox.get_nowait()
+            except queue.Empty:
+                break
+            idle = False
+            kind = message[0]
+            if kind == 'states':
+                received += 1
+                for state in message[1]:
+                    if state[0] < incumbent:
+                        heapq.heappush(heap, (state[0], -state[1], next(sequence), state))
+            elif kind == 'bound':
+                incumbent = min(incumbent, message[1])
+            elif kind == 'probe':
+                control.put(('status', index, message[1], heap[0][0] if heap else INF, sent, received,
+                             expanded, generated, duplicates, pruned, len(heap), len(parents)))
+            elif kind == 'parent':
+                parent = parents.get(message[1])
+                control.put(('parent', parent and parent[1:]))
+            elif kind == 'stop':
+                return
+
+        if exhausted:
+            idle = True
+            continue
+        if heap and heap[0][0] < incumbent:
+            _, _, _, (_, cost, player, boxes, box_key, parent_key, parent_owner, move) = heapq.heappop(heap)
+            cells, normalized = board.reachable(player, boxes)
+            key = box_key ^ player_keys[normalized]
+            link = parents.get(key)
+            if link is not None and link[0] <= cost:
+                duplicates += 1
+            else:
+                parents[key] = (cost, parent_key, parent_owner, move)
+                expanded += 1
+                if not boxes & ~board.goals:
+                    incumbent = cost
+                    control.put(('solution', cost, key, index))
+                    # граница сразу всем процессам, не дожидаясь опроса главного
+                    for i, other in enumerate(inboxes):
+                        if i != index:
+                            other.put(('bound', cost))
+                else:
+                    for box, d, target, new_boxes in board.pushes(cells, boxes):
+                        if deadlocks.is_deadlocked(box, new_boxes, target):
+                            pruned += 1
+                            continue
+                        estimate = heuristic.estimate(box, new_boxes, boxes)
+                        if estimate is None or cost + 1 + estimate >= incumbent:
+                            pruned += 1
+                            continue
+                        generated += 1
+                        new_key = zobrist.push(box_key, box, target)
+                        state = (cost + 1 + estimate, cost + 1, box, new_boxes, new_key, key, index, box * 4 + d)
+                        owner = new_key % workers
+                        if owner == index:
+                            heapq.heappush(heap, (state[0], -state[1], next(sequence), state))
+                        else:
+                            if not pending:
+                                flushed = clock()
+                            outgoing[owner].append(state)
+                            pending += 1
+
+        idle = not heap or heap[0][0] >= incumbent
+        # в простое отправляем сразу: иначе состояния ждали бы, пока процесс сам ничего не раскрывает
+        if pending and (idle or pending >= SEND_BATCH or clock() - flushed >= SEND_INTERVAL):
+            for owner, states in enumerate(outgoing):
+                if states:
+                    inboxes[owner].put(('states', states))
+                    outgoing[owner] = []
+                    sent += 1
+            pending = 0
+        if len(parents) * PARENT_ENTRY_SIZE + len(heap) * HEAP_ENTRY_SIZE > memory_limit:
+            exhausted = True
+            control.put(('memory', index))
+
+
+class HDAStarSolver:
+    """HDA* по толканиям на нескольких процессах, решение оптимально по числу толканий, как у PushSolver.
+    Эвристика и детектор тупиков копируются в каждый процесс. progress получает сводные SolverStats
+    на каждом опросе процессов; время по частям поиска не замеряется, так как поиск идет в других процессах.
+    memory_limit делится поровну между процессами; если процесс его исчерпал, поиск прерывается
+    с stats.cancelled == 'memory'"""
+
+    # поиск идет в других процессах, инструментирование не разбивает его время по частям
+    timed_parts = False
+
+    def __init__(self, heuristic=None, deadlocks=None, memory_limit=512 * 1024 * 1024, progress=None,
+                 instrumentation=None, workers=None, verbose=True):
+        self.heuristic = heuristic or MatchingHeuristic()
+        self.deadlocks = deadlocks or DeadlockDetector()
+        self.memory_limit = memory_limit
+        self.progress = progress
+        self.instrumentation = instrumentation or Instrumentation()
+        self.workers = workers or os.cpu_count() or 1
+        self.verbose = verbose
+        self.stats = SolverStats()
+
+    def solve(self, level: Level):
+        self.stats = SolverStats()
+        self.started = time.perf_counter()
+        self.instrumentation.begin(self)
+        self.log(f"Starting parallel push search on {self.workers} processes...")
+
+        self.heuristic.prepare(level.board)
+        estimate = self.heuristic.estimate(level.player, level.boxes)
+        if estimate is None or level.player < 0:
+            self.log("Start position is a deadlock")
+            return self.finish(None)
+
+        context = multiprocessing.get_context('spawn')
+        inboxes = [context.Queue() for _ in range(self.workers)]
+        control = context.Queue()
+        processes = [context.Process(target=_worker, daemon=True,
+                                     args=(i, level, self.heuristic, self.deadlocks,
+                                           self.memory_limit // self.workers, inboxes, control))
+                     for i in range(self.workers)]
+        for process in processes:
+            process.start()
+        try:
+            return self.search(level, estimate, inboxes, control, processes)
+        finally:
+            for inbox in inboxes:
+                inbox.put(('stop',))
+            for process in processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+
+    def search(self, level, estimate, inboxes, control, processes):
+        workers = len(inboxes)
+        box_key = Zobrist(level.board).hash_boxes(level.boxes)
+        inboxes[box_key % workers].put(('states', [(estimate, 0, level.player, level.boxes, box_key, None, -1, -1)]))
+        # стартовое состояние считается отправленным главным процессом
+        initial_sent = 1
+        best = None
+        incumbent = INF
+        previous = None
+        probe = 0
+
+        while True:
+            probe += 1
+            for inbox in inboxes:
+                inbox.put(('probe', probe))
+            statuses = {}
+            deadline = time.perf_counter() + REPLY_TIMEOUT
+            while len(statuses) < workers:
+                try:
+                    message = control.get(timeout=PROBE_INTERVAL)
+                except queue.Empty:
+                    if time.perf_counter() > deadline or not all(process.is_alive() for process in processes):
+                        return self.finish("Search process stopped responding")
+                    continue
+                if message[0] == 'solution' and message[1] < incumbent:
+                    incumbent = message[1]
+                    best = message[2:]
+                    for inbox in inboxes:
+                        inbox.put(('bound', incumbent))
+                elif message[0] == 'status' and message[2] == probe:
+                    statuses[message[1]] = message[3:]
+                elif message[0] == 'memory':
+                    return self.finish("Memory limit reached", cancelled='memory')
+
+            self.update(statuses.values(), incumbent)
+            if not self.report():
+                return self.finish("Search cancelled", cancelled='progress')
+
+            # завершение по четырем счетчикам: два опроса подряд без новых сообщений и без
+            # состояний дешевле решения, все отправленные сообщения получены
+            sent = initial_sent + sum(status[1] for status in statuses.values())
+            received = sum(status[2] for status in statuses.values())
+            done = all(status[0] >= incumbent for status in statuses.values())
+            current = (sent, received, done, incumbent)
+            if done and sent == received and current == previous:
+                break
+            previous = current
+            time.sleep(PROBE_INTERVAL)
+
+        if best is None:
+            return self.finish("No solution found")
+        self.stats.bound = incumbent
+        pushes = self.collect_pushes(best, incumbent, inboxes, control)
+        if pushes is None:
+            return self.finish("Solution path could not be rebuilt")
+        return self.finish("Solution found", PushSolver.expand_pushes(level, pushes))
+
+    @staticmethod
+    def collect_pushes(best, cost, inboxes, control):
+        """Толкания решения по цепочке родителей, которая хранится в процессах-владельцах.
+        Цепочка длиннее стоимости решения или оборванная дает None"""
+        key, owner = best
+        pushes = []
+        while len(pushes) <= cost:
+            inboxes[owner].put(('parent', key))
+            try:
+                while True:
+                    message = control.get(timeout=REPLY_TIMEOUT)
+                    if message[0] == 'parent':
+                        break
+            except queue.Empty:
+                return None
+            if message[1] is None:
+                return None
+            key, owner, move = message[1]
+            if key is None:
+                pushes.reverse()
+                return pushes
+            pushes.append(divmod(move, 4))
+        return None
+
+    def update(self, statuses, incumbent):
+        stats = self.stats
+        stats.expanded = stats.generated = stats.duplicates = stats.pruned = stats.frontier = stats.visited = 0
+        bound = INF
+        for min_f, _, _, expanded, generated, duplicates, pruned, frontier, visited in statuses:
+            stats.expanded += expanded
+            stats.generated += generated
+            stats.duplicates += duplicates
+            stats.pruned += pruned
+            stats.frontier += frontier
+            stats.visited += visited
+            bound = min(bound, min_f)
+        stats.max_frontier = max(stats.max_frontier, stats.frontier)
+        bound = min(bound, incumbent)
+        stats.bound = bound if bound != INF else 0
+        stats.elapsed = time.perf_counter() - self.started
+
+    def report(self):
+        if self.progress is None:
+            return True
+        return self.progress(self.stats) is not False
+
+    def finish(self, message, result=None, cancelled=False):
+        self.stats.cancelled = cancelled
+        self.stats.elapsed = time.perf_counter() - self.started
+        self.instrumentation.end(self)
+        if message:
+            self.log(f"{message} after processing {self.stats.expanded} states")
+        return result
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+
+def scaling(level, worker_counts, max_states):
+    """(солвер, процессов, раскрыто состояний, секунд) для PushSolver и HDA* на каждом числе процессов.
+    Поиск останавливается после max_states раскрытых состояний; HDA* проверяет предел на опросах
+    процессов и может раскрыть немного больше, поэтому сравнивать нужно скорость, а не время"""
+    rows = []
+    solver = PushSolver(progress=lambda progress: progress.expanded < max_states, verbose=False)
+    solver.solve(level)
+    rows.append(('push', 1, solver.stats.expanded, solver.stats.elapsed))
+    for workers in worker_counts:
+        solver = HDAStarSolver(workers=workers, progress=lambda progress: progress.expanded < max_states,
+                               verbose=False)
+        solver.solve(level)
+        rows.append(('hda', workers, solver.stats.expanded, solver.stats.elapsed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Решает уровень параллельным поиском по толканиям")
+    parser.add_argument('path', help="файл уровня")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--time-limit', type=float, default=0, help="секунд, 0 - без ограничения")
+    parser.add_argument('--scaling', help="числа процессов через запятую: замер скорости против PushSolver")
+    parser.add_argument('--max-states', type=int, default=20000, help="предел состояний для --scaling")
+    args = parser.parse_args(argv)
+    level = Level.from_file(args.path)
+
+    if args.scaling:
+        rows = scaling(level, [int(workers) for workers in args.scaling.split(',')], args.max_states)
+        base = rows[0][2] / rows[0][3]
+        print(f"cpu_count={os.cpu_count()}")
+        for name, workers, expanded, elapsed in rows:
+            rate = expanded / elapsed
+            print(f"{name:<5} {workers:>3} {expanded:>8} states {elapsed:>8.2f}s {rate:>8.0f}/s {rate / base:>6.2f}x")
+        return 0
+
+    deadline = time.perf_counter() + args.time_limit if args.time_limit else None
+    solver = HDAStarSolver(workers=args.workers,
+                           progress=lambda progress: deadline is None or time.perf_counter() < deadline)
+    solution = solver.solve(level)
+    print(f"{solver.stats}, {solver.stats.elapsed:.3f}s")
+    if solution is None:
+        return 1
+    print(f"{len(solution)} moves")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,13 @@ class Settings:
         self.SCREEN_WIDTH = 1200
         self.SCREEN_HEIGHT = 800
         self.TILE_SIZE = 36
+        # перерисовывать только изменившиеся клетки; False - полный кадр с flip каждый раз
+        self.DIRTY_RECTS = True
+        # бюджет кадров: игровой цикл спит в ожидании событий и не рисует чаще FPS раз в секунду
+        self.FPS = 60
+        # интервалы повтора удерживаемых клавиш, мс
+        self.MOVE_REPEAT = 100
+        self.UNDO_REPEAT = 80
         self.COLORS = {
             'BLACK': (0, 0, 0),
             'WHITE': (255, 255, 255),
@@ -18,6 +25,9 @@ class Settings:
         self.current_theme = "default"
         self.LEVELS_DIR = "levels"
         self.SAVE_FILE = "progress.dat"
+        self.SOLUTIONS_FILE = "solutions.db"
+        # сохраненные ходы (F5/F9) в нотации LURD
+        self.SESSIONS_DIR = "sessions"
         self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
 
         pygame.font.init()
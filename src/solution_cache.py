@@ -0,0 +1,157 @@
+import hashlib
+import json
+import sqlite3
+
+from src.level import DIRECTIONS, DIRECTION_INDEX, iter_bits
+
+
+def _transform(x, y, width, height, t):
+    """Одно из 8 преобразований квадрата: бит 4 - отражение по горизонтали, t & 3 - число поворотов на 90°"""
+    if t & 4:
+        x = width - 1 - x
+    for _ in range(t & 3):
+        x, y, width, height = height - 1 - y, x, height, width
+    return x, y, width, height
+
+
+class CanonicalForm:
+    """Каноническое представление позиции: одинаково для уровней, отличающихся поворотом, отражением,
+    пустыми полями вокруг и положением игрока внутри его области.
+    cells[k] - исходная клетка для канонической клетки k, directions[k] - исходное направление"""
+
+    def __init__(self, level):
+        board = level.board
+        bits = board.bits
+
+        # все, что вне досягаемости игрока и без ящиков и целей, считается стеной
+        inside = set(board.reachable(level.player, 0)[0]) if level.player >= 0 else set()
+        inside.update(iter_bits(level.boxes | board.goals))
+        inside = {cell for cell in inside if not board.walls & bits[cell]}
+        region = set(board.reachable(level.player, level.boxes)[0]) if level.player >= 0 else set()
+
+        xs = [cell % board.width for cell in inside] or [0]
+        ys = [cell // board.width for cell in inside] or [0]
+        left, top = min(xs), min(ys)
+        width, height = max(xs) - left + 1, max(ys) - top + 1
+
+        best = None
+        for t in range(8):
+            _, _, new_width, new_height = _transform(0, 0, width, height, t)
+            chars = ['#'] * (new_width * new_height)
+            cells = [-1] * (new_width * new_height)
+            player = new_width * new_height
+            for cell in inside:
+                x, y, _, _ = _transform(cell % board.width - left, cell // board.width - top, width, height, t)
+                k = y * new_width + x
+                cells[k] = cell
+                chars[k] = '*$. '[(0 if level.boxes & bits[cell] else 2) + (0 if board.goals & bits[cell] else 1)]
+                if cell in region and k < player:
+                    player = k
+            text = f"{new_width}x{new_height}:{player}:{''.join(chars)}"
+            if best is None or text < best[0]:
+                directions = [0] * 4
+                for d, (dx, dy) in enumerate(DIRECTIONS):
+                    # поворот и отражение вектора направления
+                    nx, ny = (-dx, dy) if t & 4 else (dx, dy)
+                    for _ in range(t & 3):
+                        nx, ny = -ny, nx
+                    directions[DIRECTION_INDEX[nx, ny]] = d
+                best = (text, cells, directions)
+
+        text, self.cells, self.directions = best
+        self.key = hashlib.sha1(text.encode()).hexdigest()
+        self.index = {cell: k for k, cell in enumerate(self.cells) if cell >= 0}
+        self.canonical_directions = {d: k for k, d in enumerate(self.directions)}
+
+    def to_canonical(self, pushes):
+        return [(self.index[box], self.canonical_directions[d]) for box, d in pushes]
+
+    def from_canonical(self, pushes):
+        return [(self.cells[box], self.directions[d]) for box, d in pushes]
+
+
+def moves_to_pushes(level, moves):
+    """Толкания (клетка ящика, направление) и номер хода после каждого из них"""
+    current = level.copy()
+    pushes = []
+    for i, (dx, dy) in enumerate(moves):
+        boxes = current.boxes
+        if not current.move_player(dx, dy):
+            return None
+        if current.boxes != boxes:
+            pushes.append((current.player, DIRECTION_INDEX[dx, dy], i + 1))
+    return pushes
+
+
+def pushes_to_moves(level, pushes):
+    """Ходы игрока для списка толканий; None, если толкания не подходят к позиции"""
+    board = level.board
+    current = level.copy()
+    moves = []
+    for box, d in pushes:
+        dx, dy = DIRECTIONS[d]
+        start = board.steps[DIRECTION_INDEX[-dx, -dy]][box]
+        if start < 0 or not current.boxes & board.bits[box]:
+            return None
+        path = board.walk(current.player, start, current.boxes)
+        if path is None:
+            return None
+        for step in path + [(dx, dy)]:
+            current.move_player(*step)
+        if current.boxes & board.bits[box]:
+            return None
+        moves.extend(path)
+        moves.append((dx, dy))
+    return moves if current.check_win() else None
+
+
+class SolutionCache:
+    """Решения на диске (SQLite) по каноническому хешу позиции. Вместе с решением сохраняется каждая
+    позиция на его пути, поэтому подсказка находится и с середины уже решенного уровня"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS solutions ("
+            "key TEXT PRIMARY KEY, pushes TEXT NOT NULL, push_count INTEGER NOT NULL, "
+            "moves INTEGER NOT NULL, states INTEGER, seconds REAL)")
+        self.connection.commit()
+
+    def get(self, level):
+        """Ходы игрока от текущей позиции до решения или None"""
+        if level.check_win():
+            return []
+        form = CanonicalForm(level)
+        row = self.connection.execute("SELECT pushes FROM solutions WHERE key = ?", (form.key,)).fetchone()
+        if row is None:
+            return None
+        return pushes_to_moves(level, form.from_canonical(json.loads(row[0])))
+
+    def put(self, level, moves, states=None, seconds=None):
+        pushes = moves_to_pushes(level, moves)
+        if pushes is None:
+            return
+
+        current = level.copy()
+        rows = []
+        done = 0
+        for i, (_, _, after) in enumerate(pushes):
+            suffix = [(box, d) for box, d, _ in pushes[i:]]
+            form = CanonicalForm(current)
+            rows.append((form.key, json.dumps(form.to_canonical(suffix)), len(suffix), len(moves) - done,
+                         states if i == 0 else None, seconds if i == 0 else None))
+            for step in moves[done:after]:
+                current.move_player(*step)
+            done = after
+
+        # более короткое решение заменяет сохраненное, более длинное - нет
+        self.connection.executemany(
+            "INSERT INTO solutions VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+            "pushes = excluded.pushes, push_count = excluded.push_count, moves = excluded.moves, "
+            "states = excluded.states, seconds = excluded.seconds "
+            "WHERE excluded.push_count < solutions.push_count", rows)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
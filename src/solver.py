@@ -1,47 +1,671 @@
-from queue import PriorityQueue
+import time
+from array import array
+from collections import deque
+from itertools import combinations
+from math import comb
 
-from src.level import Level
+from src.deadlock import DeadlockDetector
+from src.heuristics import INF, MatchingHeuristic
+from src.instrumentation import Instrumentation, SolverStats, profile_solve
+from src.level import DIRECTION_INDEX, DIRECTIONS, Level, iter_bits
+from src.open_list import OPEN_LISTS
+from src.transposition import TranspositionTable, Zobrist
+
+OPPOSITE = [DIRECTION_INDEX[-dx, -dy] for dx, dy in DIRECTIONS]
+
+class NodeArena:
+    """Дерево поиска в параллельных массивах: родитель и ход для каждого узла.
+    Путь восстанавливается один раз, когда решение найдено"""
+
+    # два 8-байтных элемента array на узел
+    ENTRY_SIZE = 16
 
-class DijkstraSolver:
     def __init__(self):
-        self.visited = set()
-        self.pq = PriorityQueue()
-        self.path = []
+        self.parent = array('l')
+        self.move = array('l')
 
-    def solve(self, level: Level):
+    def add(self, parent, move):
+        self.parent.append(parent)
+        self.move.append(move)
+        return len(self.parent) - 1
+
+    def path(self, node):
+        moves = []
+        while node > 0:
+            moves.append(self.move[node])
+            node = self.parent[node]
+        moves.reverse()
+        return moves
+
+    def clear(self):
+        self.parent = array('l')
+        self.move = array('l')
+
+    def __len__(self):
+        return len(self.parent)
+
+
+class DijkstraSolver:
+    """progress - callback, получающий SolverStats каждые progress_interval раскрытых состояний;
+    если он возвращает False, поиск прерывается и solve возвращает None.
+    Счетчики последнего поиска лежат в stats; instrumentation получает поиск в начале и в конце.
+    memory_limit ограничивает таблицу посещенных, очередь и дерево поиска вместе: при превышении
+    поиск прерывается с stats.cancelled == 'memory'. Таблице посещенных отдана доля table_share
+    этого бюджета: она заполняется и вытесняет старые записи раньше, чем срабатывает общая проверка.
+    verbose=False отключает сообщения о ходе поиска в консоль"""
+
+    progress_interval = 1000
+    # раскрытых состояний между проверками memory_limit
+    memory_interval = 64
+    # примерный размер состояния в очереди: кортеж с копией Level
+    STATE_SIZE = 280
+    # доля memory_limit под таблицу посещенных, остальное - очередь и дерево поиска: очередь растет
+    # быстрее таблицы, и таблица должна начать вытеснять раньше, чем бюджет кончится целиком
+    table_share = 0.125
+
+    def __init__(self, deadlocks=None, memory_limit=512 * 1024 * 1024, open_list='bucket', progress=None,
+                 instrumentation=None, verbose=True):
+        self.progress = progress
+        self.verbose = verbose
+        self.instrumentation = instrumentation or Instrumentation()
+        self.deadlocks = deadlocks or DeadlockDetector()
+        self.memory_limit = memory_limit
+        self.visited = TranspositionTable(int(memory_limit * self.table_share))
+        self.open = OPEN_LISTS[open_list]()
+        self.open_entry_size = self.open.ENTRY_SIZE + self.STATE_SIZE
+        self.nodes = NodeArena()
+        self.stats = SolverStats()
+
+    def prepare(self, level):
         self.visited.clear()
-        self.pq.queue.clear()
-        self.path.clear()
-        print("Starting djikstra search...")
-        self.pq.put((0, level, []))
-        steps = 0
-        
-        while not self.pq.empty():
-            cost, current, path = self.pq.get()
-            if current in self.visited:
+        self.open.clear()
+        self.nodes.clear()
+        self.nodes.add(-1, -1)
+        self.stats = SolverStats()
+        self.started = time.perf_counter()
+        self.deadlocks.prepare(level.board)
+        self.zobrist = Zobrist(level.board)
+
+    def solve(self, level: Level):
+        self.prepare(level)
+        self.instrumentation.begin(self)
+        self.log("Starting djikstra search...")
+        self.open.push((0, level, self.zobrist.hash(level.player, level.boxes)), 0)
+        timed = self.instrumentation.timed
+        clock = time.perf_counter
+        steps = generated = duplicates = pruned = 0
+
+        while self.open:
+            cost, (node, current, key) = self.open.pop()
+            if self.visited.seen(key, cost):
+                duplicates += 1
+                continue
+            self.visited.put(key, cost)
+
+            steps += 1
+            if steps % self.progress_interval == 0:
+                self.update(cost, steps, generated, duplicates, pruned)
+                if not self.report():
+                    return self.finish("Search cancelled", cancelled='progress')
+            if steps % self.memory_interval == 0 and self.memory_used() > self.memory_limit:
+                self.update(cost, steps, generated, duplicates, pruned)
+                return self.finish("Memory limit reached", cancelled='memory')
+
+            if current.check_win():
+                self.update(cost, steps, generated, duplicates, pruned)
+                return self.finish("Solution found", self.solution(level, node))
+
+            if timed:
+                expand_started = clock()
+            for d, (dx, dy) in enumerate(DIRECTIONS):
+                new_level = current.copy()
+                if not new_level.move_player(dx, dy):
+                    continue
+                new_key = self.child_key(key, current, new_level, d)
+                if self.visited.seen(new_key, cost + 1):
+                    duplicates += 1
+                elif self.is_dead_move(current, new_level, d):
+                    pruned += 1
+                else:
+                    generated += 1
+                    self.open.push((self.nodes.add(node, d), new_level, new_key), cost + 1, cost + 1)
+            if timed:
+                self.stats.expand_time += clock() - expand_started
+
+        self.update(0, steps, generated, duplicates, pruned)
+        return self.finish("No solution found")
+
+    def update(self, bound, expanded, generated, duplicates, pruned):
+        stats = self.stats
+        stats.expanded = expanded
+        stats.generated = generated
+        stats.duplicates = duplicates
+        stats.pruned = pruned
+        stats.frontier = len(self.open)
+        stats.max_frontier = max(stats.max_frontier, stats.frontier)
+        stats.visited = len(self.visited)
+        stats.bound = bound
+        stats.elapsed = time.perf_counter() - self.started
+
+    def report(self):
+        if self.progress is None:
+            return True
+        return self.progress(self.stats) is not False
+
+    def memory_used(self):
+        """Примерная память поиска в байтах: таблица посещенных, очередь и дерево поиска"""
+        return (len(self.visited) * TranspositionTable.ENTRY_SIZE + len(self.open) * self.open_entry_size
+                + len(self.nodes) * NodeArena.ENTRY_SIZE)
+
+    def finish(self, message, result=None, cancelled=False):
+        self.stats.cancelled = cancelled
+        self.instrumentation.end(self)
+        if message:
+            self.log(f"{message} after processing {self.stats.expanded} states")
+        return result
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def solution(self, level, node):
+        return [DIRECTIONS[d] for d in self.nodes.path(node)]
+
+    def child_key(self, key, current, new_level, d):
+        player = self.zobrist.player
+        key ^= player[current.player] ^ player[new_level.player]
+        if new_level.boxes != current.boxes:
+            key = self.zobrist.push(key, new_level.player, new_level.board.steps[d][new_level.player])
+        return key
+
+    def is_dead_move(self, current, new_level, d):
+        if new_level.boxes == current.boxes:
+            return False
+        box = new_level.board.steps[d][new_level.player]
+        return self.deadlocks.is_deadlocked(new_level.player, new_level.boxes, box)
+
+
+class AStarSolver(DijkstraSolver):
+    """weight > 1 - взвешенный A* с приоритетом g + weight * h: находит решение во много раз быстрее,
+    но уже не обязательно кратчайшее (длиннее не более чем в weight раз)"""
+
+    def __init__(self, heuristic=None, deadlocks=None, memory_limit=512 * 1024 * 1024, open_list=None, progress=None,
+                 instrumentation=None, verbose=True, weight=1):
+        heuristic = heuristic or MatchingHeuristic()
+        if open_list is None:
+            open_list = 'bucket' if heuristic.integral and weight == int(weight) else 'heap'
+        super().__init__(deadlocks, memory_limit, open_list, progress, instrumentation, verbose)
+        self.heuristic = heuristic
+        self.weight = weight
+
+    def prepare(self, level):
+        super().prepare(level)
+        self.heuristic.prepare(level.board)
+
+    def solve(self, level: Level):
+        self.prepare(level)
+        self.instrumentation.begin(self)
+        self.log("Starting A* search...")
+
+        estimate = self.heuristic.estimate(level.player, level.boxes)
+        if estimate is None:
+            self.log("Start position is a deadlock")
+            return self.finish(None)
+
+        key = self.zobrist.hash(level.player, level.boxes)
+        self.open.push((0, 0, level, key), self.weight * estimate)
+        timed = self.instrumentation.timed
+        clock = time.perf_counter
+        steps = generated = duplicates = pruned = 0
+
+        while self.open:
+            f, (cost, node, current, key) = self.open.pop()
+            if self.visited.seen(key, cost):
+                duplicates += 1
                 continue
-            self.visited.add(current)
-            
+            self.visited.put(key, cost)
+
             steps += 1
-            if steps % 1000 == 0:
-                print(f"Processed {steps} states, queue size: {self.pq.qsize()}, visited states: {len(self.visited)}, cost: {cost}")
+            if steps % self.progress_interval == 0:
+                self.update(f, steps, generated, duplicates, pruned)
+                if not self.report():
+                    return self.finish("Search cancelled", cancelled='progress')
+            if steps % self.memory_interval == 0 and self.memory_used() > self.memory_limit:
+                self.update(f, steps, generated, duplicates, pruned)
+                return self.finish("Memory limit reached", cancelled='memory')
 
             if current.check_win():
-                print(f"Solution found after processing {steps} states!")
-                return path
-            
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                new_level = Level(current.data)
-                if new_level.move_player(dx, dy):
-                    if new_level not in self.visited:
-                        self.pq.put((cost + 1, new_level, path + [(dx, dy)]))
-        
-        print(f"No solution found after processing {steps} states")
-        return None
+                self.update(f, steps, generated, duplicates, pruned)
+                return self.finish("Solution found", self.solution(level, node))
+
+            if timed:
+                expand_started = clock()
+            for d, (dx, dy) in enumerate(DIRECTIONS):
+                new_level = current.copy()
+                if not new_level.move_player(dx, dy):
+                    continue
+                new_key = self.child_key(key, current, new_level, d)
+                if self.visited.seen(new_key, cost + 1):
+                    duplicates += 1
+                    continue
+                if self.is_dead_move(current, new_level, d):
+                    pruned += 1
+                    continue
+                if new_level.boxes == current.boxes:
+                    estimate = f - cost
+                else:
+                    estimate = self.heuristic.estimate(new_level.player, new_level.boxes, current.boxes)
+                    if estimate is None:
+                        pruned += 1
+                        continue
+                    estimate *= self.weight
+                generated += 1
+                child = self.nodes.add(node, d)
+                self.open.push((cost + 1, child, new_level, new_key), cost + 1 + estimate, cost + 1)
+            if timed:
+                self.stats.expand_time += clock() - expand_started
+
+        self.update(0, steps, generated, duplicates, pruned)
+        return self.finish("No solution found")
+
+
+class PushSolver(AStarSolver):
+    """A* по толканиям: узел - расположение ящиков и нормализованная область игрока.
+    Решение (при weight=1) оптимально по числу толканий, путь игрока между ними строится только в конце"""
+
+    # кортеж (стоимость, узел, игрок, ящики, ключ) без копии Level
+    STATE_SIZE = 170
+
+    def solve(self, level: Level):
+        self.prepare(level)
+        self.instrumentation.begin(self)
+        board = level.board
+        self.log("Starting push search...")
+
+        estimate = self.heuristic.estimate(level.player, level.boxes)
+        if estimate is None or level.player < 0:
+            self.log("Start position is a deadlock")
+            return self.finish(None)
+
+        box_key = self.zobrist.hash_boxes(level.boxes)
+        self.open.push((0, 0, level.player, level.boxes, box_key), self.weight * estimate)
+        player_keys = self.zobrist.player
+        timed = self.instrumentation.timed
+        clock = time.perf_counter
+        steps = generated = duplicates = pruned = 0
+
+        while self.open:
+            f, (cost, node, player, boxes, box_key) = self.open.pop()
+            if timed:
+                expand_started = clock()
+            cells, normalized = board.reachable(player, boxes)
+            key = box_key ^ player_keys[normalized]
+            if self.visited.seen(key, cost):
+                duplicates += 1
+                continue
+            self.visited.put(key, cost)
+
+            steps += 1
+            if steps % self.progress_interval == 0:
+                self.update(f, steps, generated, duplicates, pruned)
+                if not self.report():
+                    return self.finish("Search cancelled", cancelled='progress')
+            if steps % self.memory_interval == 0 and self.memory_used() > self.memory_limit:
+                self.update(f, steps, generated, duplicates, pruned)
+                return self.finish("Memory limit reached", cancelled='memory')
+
+            if not boxes & ~board.goals:
+                self.update(f, steps, generated, duplicates, pruned)
+                return self.finish("Solution found", self.solution(level, node))
+
+            for box, d, target, new_boxes in board.pushes(cells, boxes):
+                if self.deadlocks.is_deadlocked(box, new_boxes, target):
+                    pruned += 1
+                    continue
+                estimate = self.heuristic.estimate(box, new_boxes, boxes)
+                if estimate is None:
+                    pruned += 1
+                    continue
+                generated += 1
+                new_key = self.zobrist.push(box_key, box, target)
+                child = self.nodes.add(node, box * 4 + d)
+                self.open.push((cost + 1, child, box, new_boxes, new_key), cost + 1 + self.weight * estimate,
+                               cost + 1)
+            if timed:
+                self.stats.expand_time += clock() - expand_started
+
+        self.update(0, steps, generated, duplicates, pruned)
+        return self.finish("No solution found")
+
+    def solution(self, level, node):
+        return self.expand_pushes(level, [divmod(move, 4) for move in self.nodes.path(node)])
+
+    @staticmethod
+    def expand_pushes(level, pushes):
+        """Разворачивает список толканий (клетка ящика, направление) в ходы игрока"""
+        board = level.board
+        player, boxes = level.player, level.boxes
+        moves = []
+        for box, d in pushes:
+            dx, dy = DIRECTIONS[d]
+            moves.extend(board.walk(player, box - dx - dy * board.width, boxes))
+            moves.append((dx, dy))
+            boxes ^= board.bits[box] ^ board.bits[board.steps[d][box]]
+            player = box
+        return moves
+
+
+class BidirectionalSolver(PushSolver):
+    """Встречный поиск: толкания вперед от старта и обратные ходы (игрок тянет ящик) от расстановок
+    ящиков на целях с игроком в каждой возможной области. Оба фронта пишут в одну хеш-таблицу
+    состояний, решение собирается в точке встречи. Слои раскрываются по очереди, каждый раз
+    у стороны с меньшим фронтом. meeting - сторона, которая нашла точку встречи.
+    forward_only - расстановок на целях слишком много, и поиск идет обычным PushSolver"""
+
+    # при большем числе вариантов расстановки ящиков на целях поиск идет только вперед
+    max_goal_layouts = 64
+    forward_only = False
+
+    def prepare(self, level):
+        super().prepare(level)
+        self.table = {}
+        self.backward_nodes = NodeArena()
+        self.backward_nodes.add(-1, -1)
+        self.frontiers = [deque(), deque()]
+        self.meeting = None
+
+    def update(self, bound, expanded, generated, duplicates, pruned):
+        super().update(bound, expanded, generated, duplicates, pruned)
+        if self.forward_only:
+            return
+        stats = self.stats
+        stats.frontier = len(self.frontiers[0]) + len(self.frontiers[1])
+        stats.max_frontier = max(stats.max_frontier, stats.frontier)
+        stats.visited = len(self.table)
+
+    def memory_used(self):
+        return (super().memory_used() + len(self.table) * TranspositionTable.ENTRY_SIZE
+                + (len(self.frontiers[0]) + len(self.frontiers[1])) * self.STATE_SIZE
+                + len(self.backward_nodes) * NodeArena.ENTRY_SIZE)
+
+    def goal_layouts(self, board, box_count):
+        goals = list(iter_bits(board.goals))
+        if len(goals) == box_count:
+            return [board.goals]
+        if len(goals) < box_count or comb(len(goals), box_count) > self.max_goal_layouts:
+            return None
+        return [sum(board.bits[goal] for goal in chosen) for chosen in combinations(goals, box_count)]
+
+    def solve(self, level: Level):
+        board = level.board
+        box_count = bin(level.boxes).count('1')
+        layouts = self.goal_layouts(board, box_count)
+        self.forward_only = layouts is None
+        if self.forward_only:
+            return super().solve(level)
+
+        self.prepare(level)
+        self.instrumentation.begin(self)
+        self.log("Starting bidirectional search...")
+        if level.player < 0:
+            self.log("Start position is a deadlock")
+            return self.finish(None)
+        if not level.boxes & ~board.goals:
+            return self.finish("Solution found", [])
+
+        table = self.table
+        player_keys = self.zobrist.player
+        forward, backward = self.frontiers
+
+        box_key = self.zobrist.hash_boxes(level.boxes)
+        _, normalized = board.reachable(level.player, level.boxes)
+        table[box_key ^ player_keys[normalized]] = 0
+        forward.append((level.player, level.boxes, box_key, 0))
+
+        # обратный поиск стартует со всех областей пола, свободных от ящиков на целях
+        for boxes in layouts:
+            box_key = self.zobrist.hash_boxes(boxes)
+            seen = boxes | board.walls
+            for cell in range(board.size):
+                if seen & board.bits[cell]:
+                    continue
+                cells, normalized = board.reachable(cell, boxes)
+                for reached in cells:
+                    seen |= board.bits[reached]
+                key = box_key ^ player_keys[normalized]
+                if key in table:
+                    if table[key] >= 0:
+                        self.meeting = 'backward'
+                        return self.finish("Solution found", self.meet(level, table[key], 0))
+                    continue
+                table[key] = ~0
+                backward.append((normalized, boxes, box_key, 0))
+
+        timed = self.instrumentation.timed
+        clock = time.perf_counter
+        depths = [0, 0]
+        steps = generated = duplicates = pruned = 0
+
+        while forward and backward:
+            side = 0 if len(forward) <= len(backward) else 1
+            frontier = self.frontiers[side]
+            layer = len(frontier)
+            meetings = []
+            for _ in range(layer):
+                player, boxes, box_key, node = frontier.popleft()
+                steps += 1
+                if steps % self.progress_interval == 0:
+                    self.update(depths[0] + depths[1], steps, generated, duplicates, pruned)
+                    if not self.report():
+                        return self.finish("Search cancelled", cancelled='progress')
+                if steps % self.memory_interval == 0 and self.memory_used() > self.memory_limit:
+                    self.update(depths[0] + depths[1], steps, generated, duplicates, pruned)
+                    return self.finish("Memory limit reached", cancelled='memory')
+
+                if timed:
+                    expand_started = clock()
+                children = self.pushes(board, player, boxes) if side == 0 else self.pulls(board, player, boxes)
+                for move, new_player, new_boxes, moved_from, moved_to in children:
+                    if new_boxes is None:
+                        pruned += 1
+                        continue
+                    new_box_key = self.zobrist.push(box_key, moved_from, moved_to)
+                    _, normalized = board.reachable(new_player, new_boxes)
+                    key = new_box_key ^ player_keys[normalized]
+                    other = table.get(key)
+                    if other is not None:
+                        if (other >= 0) == (side == 0):
+                            duplicates += 1
+                        else:
+                            meetings.append((side, node, move, other))
+                        continue
+                    generated += 1
+                    if side == 0:
+                        child = self.nodes.add(node, move)
+                        table[key] = child
+                    else:
+                        child = self.backward_nodes.add(node, move)
+                        table[key] = ~child
+                    frontier.append((new_player, new_boxes, new_box_key, child))
+                if timed:
+                    self.stats.expand_time += clock() - expand_started
+            depths[side] += 1
+
+            if meetings:
+                # все встречи слоя равны по глубине этой стороны, выбираем ближайшую на другой
+                side, node, move, other = min(meetings, key=lambda meeting: self.depth(meeting[3]))
+                self.meeting = 'forward' if side == 0 else 'backward'
+                if side == 0:
+                    forward_node, backward_node = self.nodes.add(node, move), ~other
+                else:
+                    forward_node, backward_node = other, self.backward_nodes.add(node, move)
+                self.update(depths[0] + depths[1], steps, generated, duplicates, pruned)
+                self.log(f"Frontiers met in the {self.meeting} search")
+                return self.finish("Solution found", self.meet(level, forward_node, backward_node))
+
+        self.update(depths[0] + depths[1], steps, generated, duplicates, pruned)
+        return self.finish("No solution found")
+
+    def depth(self, entry):
+        return len(self.nodes.path(entry) if entry >= 0 else self.backward_nodes.path(~entry))
+
+    def pushes(self, board, player, boxes):
+        """Толкания из позиции: (ход, игрок, ящики или None для тупика, откуда, куда)"""
+        cells, _ = board.reachable(player, boxes)
+        for box, d, target, new_boxes in board.pushes(cells, boxes):
+            if self.deadlocks.is_deadlocked(box, new_boxes, target):
+                new_boxes = None
+            yield box * 4 + d, box, new_boxes, box, target
+
+    def pulls(self, board, player, boxes):
+        """Обратные ходы: игрок в cell тянет ящик из соседней клетки и отходит на шаг назад.
+        Ход записан как толкание, которое его отменяет"""
+        bits = board.bits
+        cells, _ = board.reachable(player, boxes)
+        for cell in cells:
+            for d, step in enumerate(board.steps):
+                box = step[cell]
+                if box < 0 or not boxes & bits[box]:
+                    continue
+                behind = board.steps[OPPOSITE[d]][cell]
+                if behind < 0 or board.walls & bits[behind] or boxes & bits[behind]:
+                    continue
+                yield cell * 4 + d, behind, boxes ^ bits[box] ^ bits[cell], box, cell
+
+    def meet(self, level, forward_node, backward_node):
+        """Толкания до точки встречи и отмененные в обратном порядке ходы обратного поиска"""
+        moves = self.nodes.path(forward_node) + self.backward_nodes.path(backward_node)[::-1]
+        return self.expand_pushes(level, [divmod(move, 4) for move in moves])
+
+
+class IDAStarSolver(PushSolver):
+    """IDA* по толканиям: поиск в глубину с растущей границей f = g + h. Память ограничена
+    таблицей посещенных состояний (memory_limit) и стеком глубиной в длину решения, поэтому
+    на больших досках время меняется на память. iterations - список (граница, узлов за итерацию)"""
+
+    def __init__(self, heuristic=None, deadlocks=None, memory_limit=64 * 1024 * 1024, progress=None,
+                 instrumentation=None, verbose=True):
+        super().__init__(heuristic, deadlocks, memory_limit, None, progress, instrumentation, verbose)
+        # кэш эвристики тоже укладывается в memory_limit: ему четверть бюджета, таблице - остальное
+        cache_size = getattr(self.heuristic, 'cache_size', None)
+        if cache_size is not None:
+            share = memory_limit // 4
+            self.heuristic.cache_size = max(1, min(cache_size, share // self.heuristic.ENTRY_SIZE))
+            self.visited = TranspositionTable(memory_limit - share)
+        self.iterations = []
+        self.stack = []
+
+    def update(self, bound, expanded, generated, duplicates, pruned):
+        super().update(bound, expanded, generated, duplicates, pruned)
+        self.stats.frontier = len(self.stack)
+        self.stats.max_frontier = max(self.stats.max_frontier, self.stats.frontier)
+
+    def solve(self, level: Level):
+        self.prepare(level)
+        self.instrumentation.begin(self)
+        board = level.board
+        self.log("Starting IDA* search...")
+        self.iterations = []
+
+        bound = self.heuristic.estimate(level.player, level.boxes)
+        if bound is None or level.player < 0:
+            self.log("Start position is a deadlock")
+            return self.finish(None)
+
+        player_keys = self.zobrist.player
+        timed = self.instrumentation.timed
+        clock = time.perf_counter
+        steps = generated = duplicates = pruned = 0
+
+        while True:
+            # таблица хранит лучшую глубину в текущей итерации; с новой границей все раскрывается заново
+            self.visited.clear()
+            started_steps = steps
+            next_bound = INF
+            stack = self.stack = []
+            path = []
+            pending = (level.player, level.boxes, self.zobrist.hash_boxes(level.boxes), 0)
+
+            while True:
+                if pending is not None:
+                    player, boxes, box_key, cost = pending
+                    pending = None
+                    if timed:
+                        expand_started = clock()
+                    cells, normalized = board.reachable(player, boxes)
+                    key = box_key ^ player_keys[normalized]
+                    if self.visited.seen(key, cost):
+                        duplicates += 1
+                        path.pop()
+                        continue
+                    self.visited.put(key, cost)
+
+                    steps += 1
+                    if steps % self.progress_interval == 0:
+                        self.update(bound, steps, generated, duplicates, pruned)
+                        if not self.report():
+                            return self.finish("Search cancelled", cancelled='progress')
+
+                    if not boxes & ~board.goals:
+                        self.iterations.append((bound, steps - started_steps))
+                        self.update(bound, steps, generated, duplicates, pruned)
+                        pushes = [divmod(move, 4) for move in path]
+                        return self.finish(f"Solution found with bound {bound}", self.expand_pushes(level, pushes))
+
+                    children = []
+                    for box, d, target, new_boxes in board.pushes(cells, boxes):
+                        if self.deadlocks.is_deadlocked(box, new_boxes, target):
+                            pruned += 1
+                            continue
+                        estimate = self.heuristic.estimate(box, new_boxes, boxes)
+                        if estimate is None:
+                            pruned += 1
+                            continue
+                        if cost + 1 + estimate > bound:
+                            next_bound = min(next_bound, cost + 1 + estimate)
+                            continue
+                        generated += 1
+                        children.append((estimate, box * 4 + d, box, new_boxes,
+                                         self.zobrist.push(box_key, box, target)))
+                    # сначала ходы с меньшей оценкой
+                    children.sort(key=lambda child: child[0])
+                    stack.append([children, 0, cost])
+                    if timed:
+                        self.stats.expand_time += clock() - expand_started
+                    continue
+
+                if not stack:
+                    break
+                frame = stack[-1]
+                children, index, cost = frame
+                if index == len(children):
+                    stack.pop()
+                    if path:
+                        path.pop()
+                    continue
+                frame[1] += 1
+                _, move, new_player, new_boxes, new_key = children[index]
+                path.append(move)
+                pending = (new_player, new_boxes, new_key, cost + 1)
+
+            self.iterations.append((bound, steps - started_steps))
+            self.log(f"Bound {bound}: {steps - started_steps} nodes")
+            if next_bound == INF:
+                self.update(bound, steps, generated, duplicates, pruned)
+                return self.finish("No solution found")
+            bound = next_bound
+
+
+def quick_solver(**kwargs):
+    """Солвер для кнопки S и фоновых подсказок: взвешенный поиск по толканиям с отсечением
+    корралов. Решение не обязательно кратчайшее, зато находится там, где оптимальный PushSolver
+    не укладывается в разумное время; замеры - случаи ':quick' в src.benchmark"""
+    solver = PushSolver(deadlocks=DeadlockDetector(corral=True, corral_limit=20), weight=2, **kwargs)
+    # с проверкой корралов состояния раскрываются медленно - прогресс и отмена чаще
+    solver.progress_interval = 16
+    return solver
 
 
 if __name__ == "__main__":
     level = Level.from_file("levels/level02.txt")
-    solver = DijkstraSolver()
-    solution = solver.solve(level)
-    print(solution)
+    print(profile_solve(PushSolver(), level, memory=True))
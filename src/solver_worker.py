@@ -0,0 +1,78 @@
+import multiprocessing
+import queue
+import time
+
+from src.instrumentation import SolverStats
+
+
+def _run_solver(solver, level, progress_queue, result_queue, cancel_event):
+    def report(progress):
+        try:
+            progress_queue.put_nowait(progress.copy())
+        except queue.Full:
+            pass
+        return not cancel_event.is_set()
+
+    solver.progress = report
+    solution = solver.solve(level)
+    result_queue.put((solution, solver.stats))
+
+
+class SolveTask:
+    """Запускает солвер в отдельном процессе, чтобы не блокировать игровой цикл.
+    poll() вызывается каждый кадр: забирает последний прогресс и готовый результат;
+    после завершения в progress - итоговые SolverStats поиска. Если процесс отменен или завершился,
+    не передав результат, progress.cancelled - 'progress' или 'process'"""
+
+    def __init__(self, solver, level):
+        context = multiprocessing.get_context('spawn')
+        self.level = level.copy()
+        self.started = time.time()
+        self.elapsed = None
+        self.progress = SolverStats()
+        self.result = None
+        self.done = False
+        self.cancelled = False
+        self._progress_queue = context.Queue(maxsize=16)
+        self._result_queue = context.Queue()
+        self._cancel_event = context.Event()
+        self._process = context.Process(
+            target=_run_solver,
+            args=(solver, self.level, self._progress_queue, self._result_queue, self._cancel_event),
+            daemon=True)
+        self._process.start()
+
+    def poll(self):
+        while True:
+            try:
+                self.progress = self._progress_queue.get_nowait()
+            except queue.Empty:
+                break
+
+        if not self.done:
+            try:
+                self.result, self.progress = self._result_queue.get_nowait()
+                self.elapsed = time.time() - self.started
+                self.done = True
+                self._process.join()
+            except queue.Empty:
+                if not self._process.is_alive():
+                    # процесс мог завершиться, не успев передать результат
+                    try:
+                        self.result, self.progress = self._result_queue.get(timeout=0.1)
+                    except queue.Empty:
+                        self.progress.cancelled = 'process'
+                    self.done = True
+        return self.done
+
+    def cancel(self):
+        if self.done:
+            return
+        self.cancelled = True
+        self.progress.cancelled = 'progress'
+        self._cancel_event.set()
+        self._process.join(timeout=0.5)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self.done = True
@@ -0,0 +1,72 @@
+import random
+from collections import OrderedDict
+
+from src.level import iter_bits
+
+
+class Zobrist:
+    """64-битные ключи Зобриста для клеток игрока и ящиков; хеш состояния обновляется за O(1) на ход"""
+
+    def __init__(self, board, seed=0):
+        rng = random.Random(seed)
+        self.player = [rng.getrandbits(64) for _ in range(board.size)]
+        self.box = [rng.getrandbits(64) for _ in range(board.size)]
+
+    def hash_boxes(self, boxes):
+        key = 0
+        for cell in iter_bits(boxes):
+            key ^= self.box[cell]
+        return key
+
+    def hash(self, player, boxes):
+        return self.hash_boxes(boxes) ^ self.player[player]
+
+    def push(self, key, box, target):
+        return key ^ self.box[box] ^ self.box[target]
+
+
+class TranspositionTable:
+    """Таблица посещенных состояний (хеш -> лучшая стоимость) с ограничением по памяти.
+    При переполнении вытесняется самая старая запись: состояние может быть раскрыто повторно,
+    но поиск не упадет по нехватке памяти"""
+
+    # примерный размер записи OrderedDict с 64-битным ключом и небольшим целым значением
+    ENTRY_SIZE = 160
+
+    def __init__(self, memory_limit=512 * 1024 * 1024):
+        self.memory_limit = memory_limit
+        self.capacity = max(1, memory_limit // self.ENTRY_SIZE)
+        self.table = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key):
+        return self.table.get(key)
+
+    def put(self, key, cost):
+        table = self.table
+        old = table.get(key)
+        if old is not None:
+            if cost < old:
+                table[key] = cost
+            return
+        if len(table) >= self.capacity:
+            # у обычного dict удаление первой записи оставляет пустые слоты, которые next(iter())
+            # обходит заново при каждом вытеснении; OrderedDict снимает голову списка за O(1)
+            table.popitem(last=False)
+            self.evictions += 1
+        table[key] = cost
+
+    def seen(self, key, cost):
+        """Состояние уже встречалось со стоимостью не больше cost"""
+        old = self.table.get(key)
+        return old is not None and old <= cost
+
+    def clear(self):
+        self.table.clear()
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.table
+
+    def __len__(self):
+        return len(self.table)
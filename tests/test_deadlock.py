@@ -0,0 +1,30 @@
+from src.deadlock import DeadlockDetector
+from src.level import Level
+
+
+def detector(level):
+    deadlocks = DeadlockDetector()
+    deadlocks.prepare(level.board)
+    return deadlocks
+
+
+def test_frozen_pair_off_goal():
+    level = Level(["######",
+                   "#.$$ #",
+                   "#@  .#",
+                   "######"])
+    board = level.board
+    assert detector(level).is_frozen(level.boxes, board.index(2, 1))
+
+
+def test_failed_branch_does_not_leak_frozen_boxes():
+    # ящики слева от (4, 2) не заморожены: проверка их ветки не должна оставить их в списке
+    level = Level(["#######",
+                   "#@#   #",
+                   "# $$**#",
+                   "#   ###",
+                   "#     #",
+                   "#     #",
+                   "#######"])
+    board = level.board
+    assert not detector(level).is_frozen(level.boxes, board.index(4, 2))
@@ -0,0 +1,53 @@
+import pytest
+
+from src.history import MoveHistory
+from src.level import Level
+
+ROWS = ["#######",
+        "#@ $ .#",
+        "#     #",
+        "#######"]
+
+
+def test_lurd_marks_pushes_in_upper_case():
+    level = Level(ROWS)
+    history = MoveHistory()
+    for dx, dy in [(1, 0), (1, 0), (0, 1), (-1, 0), (0, -1)]:
+        assert history.move(level, dx, dy)
+    assert history.to_lurd() == "rRdlu"
+
+    # отмененные ходы не экспортируются, но доступны для повтора
+    history.undo(level)
+    history.undo(level)
+    assert history.to_lurd() == "rRd"
+    history.redo(level)
+    assert history.to_lurd() == "rRdl"
+
+
+def test_replay_round_trip_and_save_load(tmp_path):
+    level = Level(ROWS)
+    history = MoveHistory()
+    history.replay(level, "rR R")
+    assert level.check_win() and history.to_lurd() == "rRR"
+
+    path = str(tmp_path / 'moves.lurd')
+    history.save(path)
+    # load возвращает позицию к началу перед повтором
+    history.load(level, path)
+    assert level.check_win() and history.to_lurd() == "rRR"
+    history.rewind(level)
+    assert level.data == Level(ROWS).data and len(history) == 0
+    assert history.redo(level) and history.to_lurd() == "r"
+
+
+@pytest.mark.parametrize('lurd, done', [("rx", "r"), ("rr", "r"), ("RR", ""), ("u", "")])
+def test_replay_rejects_bad_moves(lurd, done):
+    level = Level(ROWS)
+    history = MoveHistory()
+    with pytest.raises(ValueError):
+        history.replay(level, lurd)
+    # ходы до ошибки остаются сделанными, ошибочный - нет
+    assert history.to_lurd() == done
+    expected = Level(ROWS)
+    MoveHistory().replay(expected, done)
+    assert level.data == expected.data
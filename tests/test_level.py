@@ -0,0 +1,63 @@
+import os
+import random
+
+import pytest
+
+from src.history import MoveHistory
+from src.level import DIRECTIONS, Level
+
+LEVELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'levels')
+LEVEL_FILES = [os.path.join(LEVELS_DIR, f"level{i:02}.txt") for i in range(9)]
+
+
+def boxes_off_goal(rows):
+    """Прежняя проверка по строкам: ящик не на цели - это '$'"""
+    return sum(row.count('$') for row in rows)
+
+
+def assert_counters(level):
+    rows = level.data
+    assert level.off_goal == boxes_off_goal(rows)
+    assert level.check_win() == (not any('$' in row for row in rows))
+
+
+@pytest.mark.parametrize('path', LEVEL_FILES, ids=os.path.basename)
+def test_counters_follow_moves_and_undo(path):
+    level = Level.from_file(path)
+    history = MoveHistory()
+    rng = random.Random(path)
+    assert_counters(level)
+    for _ in range(3000):
+        action = rng.random()
+        if action < 0.25:
+            history.undo(level)
+        elif action < 0.3:
+            history.redo(level)
+        else:
+            history.move(level, *rng.choice(DIRECTIONS))
+        assert_counters(level)
+        assert_counters(level.copy())
+
+
+@pytest.mark.parametrize('path', LEVEL_FILES, ids=os.path.basename)
+def test_counters_on_construction(path):
+    level = Level.from_file(path)
+    assert_counters(level)
+    assert_counters(Level(level.data))
+    assert_counters(Level.from_state(level.board, level.player, level.boxes))
+
+    other = Level.from_file(LEVEL_FILES[0])
+    other.data = level.data
+    assert_counters(other)
+
+
+def test_win_after_last_box_reaches_goal():
+    level = Level(["#####",
+                   "#@$.#",
+                   "#####"])
+    assert level.off_goal == 1 and not level.check_win()
+    assert level.move_player(1, 0)
+    assert level.off_goal == 0 and level.check_win()
+    level.undo_move(1, 0, True)
+    assert level.off_goal == 1 and not level.check_win()
+    assert level.data == ["#####", "#@$.#", "#####"]
@@ -0,0 +1,24 @@
+import random
+
+from src.level import Level
+from src.level_generator import LevelGenerator
+
+
+def test_reverse_generation_box_count_follows_box_chance_with_cap():
+    random.seed(0)
+    generator = LevelGenerator(15, 15)
+    generator.pulls = 40
+    generator.box_chance = 0.5
+    for _ in range(5):
+        level = Level(generator.generate())
+        boxes = bin(level.boxes).count('1')
+        assert boxes == generator.max_boxes
+        assert bin(level.board.goals).count('1') == boxes
+
+    generator = LevelGenerator(7, 7)
+    generator.pulls = 40
+    generator.wall_chance = 0
+    generator.box_chance = 0.12
+    level = Level(generator.generate())
+    # 25 клеток пола, 12% из них - три ящика
+    assert bin(level.boxes).count('1') == 3
@@ -0,0 +1,81 @@
+import os
+
+from src.level_repository import LevelRepository, scan_levels
+
+PACK = """; Sample pack
+Title: First
+
+#####
+#@$.#
+#####
+; between levels
+
+Title: Second
+  ####
+###  #
+#@ $.#
+######
+Comment: trailing
+#####
+#.$@#
+#####
+"""
+
+
+def write(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, 'w') as file:
+        file.write(text)
+    return path
+
+
+def test_scan_levels_skips_comments_and_titles():
+    data = PACK.encode()
+    offsets = scan_levels(data)
+    levels = [data[offsets[i]:offsets[i + 1]].decode() for i in range(0, len(offsets), 2)]
+    assert levels == ["#####\n#@$.#\n#####\n",
+                      "  ####\n###  #\n#@ $.#\n######\n",
+                      "#####\n#.$@#\n#####\n"]
+
+
+def test_repository_spans_packs_and_single_files(tmp_path):
+    write(tmp_path, 'a.txt', "####\n#@*#\n####\n")
+    write(tmp_path, 'b.xsb', PACK)
+    write(tmp_path, 'c.sok', "Title: only\n#####\n#@$.#\n#####")
+    write(tmp_path, 'notes.md', "#####\n#@$.#\n#####\n")
+    repository = LevelRepository(str(tmp_path))
+    try:
+        assert len(repository) == 5
+        assert repository[0] == ["####", "#@*#", "####"]
+        # строки дополняются пробелами до ширины уровня
+        assert repository[2] == ["  ####", "###  #", "#@ $.#", "######"]
+        assert repository[3] == ["#####", "#.$@#", "#####"]
+        assert repository[4] == repository[-1] == ["#####", "#@$.#", "#####"]
+
+        repository.append(["###", "#@#", "###"])
+        assert len(repository) == 6 and repository[5] == ["###", "#@#", "###"]
+    finally:
+        repository.close()
+
+
+def test_index_is_reused_and_rebuilt_on_change(tmp_path):
+    path = write(tmp_path, 'pack.xsb', PACK)
+    repository = LevelRepository(str(tmp_path))
+    repository.close()
+    index = os.path.join(str(tmp_path), '.index', 'pack.xsb.idx')
+    assert os.path.exists(index)
+
+    # индекс с диска: смещения читаются из файла индекса, а не сканированием текста
+    repository = LevelRepository(str(tmp_path))
+    assert repository.packs[0]._offsets is None
+    assert repository[1] == ["  ####", "###  #", "#@ $.#", "######"]
+    repository.close()
+
+    with open(path, 'a') as file:
+        file.write("\n####\n#@*#\n####\n")
+    repository = LevelRepository(str(tmp_path))
+    try:
+        assert len(repository) == 4
+        assert repository[3] == ["####", "#@*#", "####"]
+    finally:
+        repository.close()
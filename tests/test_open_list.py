@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from src.open_list import OPEN_LISTS, BucketQueue, HeapQueue
+
+
+def reference_order(pushed):
+    """Ожидаемый порядок: меньший приоритет, при равенстве - большая глубина, затем порядок добавления"""
+    return [item for _, item in sorted(enumerate(pushed), key=lambda entry: (entry[1][1], -entry[1][2], entry[0]))]
+
+
+@pytest.mark.parametrize('name', sorted(OPEN_LISTS))
+def test_pop_order_matches_priority_then_depth_then_fifo(name):
+    rng = random.Random(name)
+    queue = OPEN_LISTS[name]()
+    pushed = [(i, rng.randrange(20), rng.randrange(6)) for i in range(500)]
+    for item in pushed:
+        queue.push(item, item[1], item[2])
+    assert len(queue) == len(pushed)
+
+    popped = []
+    while queue:
+        priority, item = queue.pop()
+        assert priority == item[1]
+        popped.append(item)
+    assert popped == reference_order(pushed)
+
+
+@pytest.mark.parametrize('name', sorted(OPEN_LISTS))
+def test_interleaved_push_and_pop(name):
+    rng = random.Random(name)
+    queue = OPEN_LISTS[name]()
+    pending = []
+    sequence = 0
+    for _ in range(2000):
+        if pending and rng.random() < 0.4:
+            expected = reference_order(pending)[0]
+            priority, item = queue.pop()
+            assert item == expected and priority == item[1]
+            pending.remove(item)
+        else:
+            # приоритет может оказаться ниже уже снятых: BucketQueue должна вернуться назад
+            item = (sequence, rng.randrange(30), rng.randrange(4))
+            sequence += 1
+            queue.push(item, item[1], item[2])
+            pending.append(item)
+        assert len(queue) == len(pending)
+
+
+def test_heap_accepts_fractional_priorities():
+    queue = HeapQueue()
+    for priority in (2.5, 0.5, 1.25):
+        queue.push(priority, priority)
+    assert [queue.pop()[0] for _ in range(3)] == [0.5, 1.25, 2.5]
+
+
+def test_clear_empties_queue():
+    for queue in (BucketQueue(), HeapQueue()):
+        queue.push('a', 3, 1)
+        queue.clear()
+        assert len(queue) == 0
+        queue.push('b', 1)
+        assert queue.pop() == (1, 'b')
@@ -0,0 +1,116 @@
+import os
+
+from src.level import Level
+from src.solution_cache import CanonicalForm, SolutionCache
+from src.solver import PushSolver
+
+LEVELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'levels')
+
+
+def load_rows(name):
+    rows = Level.from_file(os.path.join(LEVELS_DIR, name)).data
+    width = max(len(row) for row in rows)
+    return [row.ljust(width) for row in rows]
+
+
+def rotate(rows):
+    return [''.join(row[x] for row in reversed(rows)) for x in range(len(rows[0]))]
+
+
+def mirror(rows):
+    return [row[::-1] for row in rows]
+
+
+def symmetries(rows):
+    for mirrored in (rows, mirror(rows)):
+        for _ in range(4):
+            yield mirrored
+            mirrored = rotate(mirrored)
+
+
+def pad(rows, margin=2):
+    width = len(rows[0]) + 2 * margin
+    blank = [' ' * width] * margin
+    return blank + [' ' * margin + row + ' ' * margin for row in rows] + blank
+
+
+def replay(level, moves):
+    for dx, dy in moves:
+        assert level.move_player(dx, dy)
+    return level.check_win()
+
+
+def test_key_is_invariant_under_symmetry_and_padding():
+    rows = load_rows('level02.txt')
+    key = CanonicalForm(Level(rows)).key
+    variants = list(symmetries(rows))
+    assert len({tuple(variant) for variant in variants}) == 8
+    for variant in variants:
+        assert CanonicalForm(Level(variant)).key == key
+        assert CanonicalForm(Level(pad(variant))).key == key
+
+
+def test_key_ignores_player_cell_within_region_but_not_boxes():
+    level = Level(load_rows('level02.txt'))
+    key = CanonicalForm(level).key
+    moved = level.copy()
+    # ход без толкания оставляет игрока в той же области
+    for dx, dy in [(0, -1), (1, 0), (-1, 0), (0, 1)]:
+        step = level.copy()
+        if step.move_player(dx, dy) and step.boxes == level.boxes:
+            moved = step
+            break
+    assert moved.player != level.player
+    assert CanonicalForm(moved).key == key
+
+    pushed = Level(["#######",
+                    "#@$ . #",
+                    "#######"])
+    shifted = Level(["#######",
+                     "#@ $. #",
+                     "#######"])
+    assert CanonicalForm(pushed).key != CanonicalForm(shifted).key
+
+
+def test_cached_solution_applies_to_transformed_and_partial_positions(tmp_path):
+    rows = load_rows('level01.txt')
+    moves = PushSolver(verbose=False).solve(Level(rows))
+    cache = SolutionCache(str(tmp_path / 'solutions.db'))
+    try:
+        cache.put(Level(rows), moves, states=16, seconds=0.01)
+        for variant in symmetries(rows):
+            level = Level(pad(variant))
+            cached = cache.get(level)
+            assert cached is not None and replay(level, cached)
+
+        # позиция с середины решения тоже найдена
+        level = Level(rows)
+        for dx, dy in moves[:len(moves) // 2]:
+            level.move_player(dx, dy)
+        cached = cache.get(level)
+        assert cached is not None and replay(level, cached)
+
+        assert cache.get(Level(["#####", "#@$.#", "#. $#", "#####"])) is None
+    finally:
+        cache.close()
+
+
+def test_shorter_solution_replaces_longer(tmp_path):
+    level = Level(["#######",
+                   "#@ $ .#",
+                   "#     #",
+                   "#######"])
+    cache = SolutionCache(str(tmp_path / 'solutions.db'))
+    try:
+        # ящик уезжает вправо, возвращается влево и снова едет к цели: четыре толкания против двух
+        detour = [(1, 0), (1, 0), (0, 1), (1, 0), (1, 0), (0, -1), (-1, 0), (0, 1), (-1, 0), (-1, 0),
+                  (0, -1), (1, 0), (1, 0)]
+        direct = [(1, 0), (1, 0), (1, 0)]
+        assert replay(level.copy(), detour) and replay(level.copy(), direct)
+        cache.put(level, detour)
+        cache.put(level, direct)
+        assert cache.get(level) == direct
+        cache.put(level, detour)
+        assert cache.get(level) == direct
+    finally:
+        cache.close()
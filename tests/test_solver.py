@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from src.instrumentation import StatsCollector
+from src.level import Level
+from src.parallel_solver import HDAStarSolver
+from src.solver import AStarSolver, BidirectionalSolver, DijkstraSolver, PushSolver
+
+LEVELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'levels')
+
+
+def replay(level, moves):
+    for dx, dy in moves:
+        assert level.move_player(dx, dy)
+    return level.check_win()
+
+
+@pytest.mark.parametrize('solver_class', [DijkstraSolver, AStarSolver])
+def test_tight_memory_limit_evicts_and_still_solves(solver_class):
+    path = os.path.join(LEVELS_DIR, 'level01.txt')
+    optimal = solver_class(verbose=False).solve(Level.from_file(path))
+
+    solver = solver_class(memory_limit=256 * 1024, verbose=False)
+    moves = solver.solve(Level.from_file(path))
+    assert solver.visited.evictions > 0
+    assert not solver.stats.cancelled
+    assert len(moves) == len(optimal)
+    assert replay(Level.from_file(path), moves)
+
+
+def test_bidirectional_fallback_reports_forward_stats():
+    solver = BidirectionalSolver(verbose=False)
+    solver.max_goal_layouts = 2
+    seen = []
+    solver.progress = lambda stats: seen.append((stats.frontier, stats.visited))
+    solver.progress_interval = 1
+    # три цели на один ящик - больше max_goal_layouts расстановок, поиск идет только вперед
+    level = Level(["#######",
+                   "#.    #",
+                   "# $ @ #",
+                   "#.   .#",
+                   "#######"])
+    assert solver.solve(level) is not None
+    assert solver.forward_only
+    assert seen and all(visited > 0 for _, visited in seen)
+    assert any(frontier > 0 for frontier, _ in seen)
+    assert solver.stats.visited == len(solver.visited)
+
+
+def test_parallel_solver_is_push_optimal_and_instrumented():
+    path = os.path.join(LEVELS_DIR, 'level02.txt')
+    push = PushSolver(verbose=False)
+    push.solve(Level.from_file(path))
+
+    collector = StatsCollector()
+    solver = HDAStarSolver(workers=2, instrumentation=collector, verbose=False)
+    moves = solver.solve(Level.from_file(path))
+    assert replay(Level.from_file(path), moves)
+    assert solver.stats.bound == push.stats.bound
+    assert len(collector.runs) == 1 and collector.last.expanded == solver.stats.expanded